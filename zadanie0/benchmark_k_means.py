@@ -0,0 +1,138 @@
+"""Benchmark of the k_means pipeline on synthetic datasets.
+
+Every combination of the requested number of rows, dimensions and clusters is
+generated as Gaussian blobs and timed phase by phase (data preparation,
+normalize, distance, assign_clusters, update_centers and the whole kmeans
+run). Peak memory of preparation plus clustering is measured with tracemalloc
+in a separate run so it does not distort the timings. Results are written as
+JSON lines, one line per case and engine, so two versions can be diffed.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import k_means
+
+
+def generate_rows(n_rows, n_dims, n_clusters, rng):
+    blob_centers = [[rng.uniform(-10, 10) for _ in range(n_dims)]
+                    for _ in range(n_clusters)]
+    rows = []
+    for i in range(n_rows):
+        center = blob_centers[i % n_clusters]
+        rows.append([repr(rng.gauss(coord, 1.0)) for coord in center])
+    return rows
+
+
+def timed(function, *args, repeat=1):
+    """Best wall time of `repeat` calls and the result of the last one."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def normalize_pass():
+    for point in k_means.data:
+        k_means.normalize_point(point)
+
+
+def distance_pass(center):
+    for point in k_means.normalized_data:
+        k_means.distance(point, center)
+
+
+def benchmark_case(rows, n_clusters, engine, seed, repeat):
+    result = {}
+    result["prepare"], _ = timed(k_means.prepare_data, rows, repeat=repeat)
+    result["normalize"], _ = timed(normalize_pass, repeat=repeat)
+
+    random.seed(seed)
+    centers = k_means.initialize_centers(n_clusters)
+    result["distance"], _ = timed(distance_pass, k_means.normalized_data[0],
+                                  repeat=repeat)
+    if engine == "numpy":
+        result["assign_clusters"], (labels, _) = timed(
+            k_means.assign_clusters_numpy, centers, repeat=repeat)
+        result["update_centers"], _ = timed(
+            k_means.update_centers_numpy, [list(c) for c in centers], labels,
+            repeat=repeat)
+    else:
+        result["assign_clusters"], (labels, _) = timed(
+            k_means.assign_clusters, centers, repeat=repeat)
+        result["update_centers"], _ = timed(
+            k_means.update_centers, [list(c) for c in centers], labels,
+            repeat=repeat)
+
+    start = time.perf_counter()
+    _, wcss, n_iters = k_means.kmeans(n_clusters, engine, centers=centers)
+    result["kmeans"] = time.perf_counter() - start
+    result["iterations"] = n_iters
+    result["wcss"] = wcss
+
+    tracemalloc.start()
+    k_means.prepare_data(rows)
+    k_means.kmeans(n_clusters, engine, centers=centers)
+    result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def argument_parse():
+    parser = argparse.ArgumentParser(description="K-means benchmark.")
+    parser.add_argument("-n", "--rows", type=int, nargs="+",
+                        default=[1000, 5000, 20000], metavar="NUM")
+    parser.add_argument("-d", "--dims", type=int, nargs="+", default=[2, 8],
+                        metavar="NUM")
+    parser.add_argument("-k", "--clusters", type=int, nargs="+",
+                        default=[3, 8], metavar="NUM")
+    parser.add_argument("-e", "--engines", nargs="+",
+                        choices=["numpy", "python"], default=None,
+                        help="Engines to benchmark, all available by default")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="Repetitions of every phase, best time is kept")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="Write JSON lines here instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    args = argument_parse()
+    engines = args.engines
+    if engines is None:
+        engines = ["python"] + (["numpy"] if k_means.np is not None else [])
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for n_rows in args.rows:
+            for n_dims in args.dims:
+                for n_clusters in args.clusters:
+                    rows = generate_rows(n_rows, n_dims, n_clusters,
+                                         random.Random(args.seed))
+                    for engine in engines:
+                        record = {
+                            "rows": n_rows,
+                            "dims": n_dims,
+                            "clusters": n_clusters,
+                            "engine": engine,
+                            "python": platform.python_version(),
+                        }
+                        record.update(benchmark_case(rows, n_clusters, engine,
+                                                     args.seed, args.repeat))
+                        output.write(json.dumps(record) + "\n")
+                        output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
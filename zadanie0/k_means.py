@@ -1,4 +1,4 @@
-"""K-means clustering using pure Python.
+"""K-means clustering using pure Python (with an optional NumPy engine).
 
 This program is intended to group multidimensional data using the k-means
 clustering algorithm. The data should be supplied as a CSV file. The clusters
@@ -7,49 +7,100 @@ the number of algorithm iterations, and the final within-cluster sum of
 squares.
 """
 
-# normalize data once during data loading
 # more descriptive names: temp or range are not accurate 
-# error handling while opening file
-# variable hardly encoded kmeans(3). Make this a global_variable
 
 
+import argparse
 import csv
+import hashlib
+import json
 import math
+import multiprocessing
 import random
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# rows processed at once by the NumPy engine; dimensions are accumulated one at
+# a time, so the largest temporary is the CHUNK_SIZE x k distance buffer
+CHUNK_SIZE = 65536
+# safety margin for bound comparisons, absorbs floating point rounding
+BOUND_TOLERANCE = 1e-9
+N_CLUSTERS = 3
+DATA_FILE_NAME = "data.csv"
+# results of k sweeps, keyed by dataset hash, engine, k, seed and starting k
+CACHE_FILE_NAME = "kmeans_cache.json"
 
-file = open("data.csv", newline="")
 temp = 0.0
 
 
 def distance(point, center):
-    temp = 0.0
+    """Euclidean distance between two already normalized points."""
+    squared_sum = 0.0
     for i in range(len(point)):
-        point_x = normalize(point[i], i)
-        center_x = normalize(center[i], i)
-        temp += (point_x - center_x)**2
-    return math.sqrt(temp)
+        squared_sum += (point[i] - center[i])**2
+    return math.sqrt(squared_sum)
 
 
 def normalize(val, coord):
-    column = []
-    for point in data:
-        column.append(float(point[coord]))
-    min_val = min(column)
-    max_val = max(column)
-    range = max_val - min_val
-    return (float(val) - min_val) / range
+    """Min-max normalize a value using the precomputed column statistics."""
+    if column_range[coord] == 0:
+        return 0.0
+    return (float(val) - column_min[coord]) / column_range[coord]
+
+
+def normalize_point(point):
+    return [normalize(val, coord) for coord, val in enumerate(point)]
+
+
+def normalize_with(point, minimums, ranges):
+    """normalize_point() with explicit column statistics instead of the globals."""
+    return [0.0 if ranges[coord] == 0 else (val - minimums[coord]) / ranges[coord]
+            for coord, val in enumerate(point)]
 
 
 def initialize_centers(n_centers):
     return random.sample(data, n_centers)
 
 
+def initialize_centers_plus_plus(n_centers, rng=random):
+    """k-means++ seeding: each next center is drawn with probability
+    proportional to the squared distance to the closest chosen center."""
+    chosen = [rng.randrange(len(normalized_data))]
+    closest_sq = [distance(point, normalized_data[chosen[0]])**2
+                  for point in normalized_data]
+    for _ in range(1, n_centers):
+        total = sum(closest_sq)
+        if total == 0:
+            index = rng.randrange(len(normalized_data))
+        else:
+            target = rng.random() * total
+            cumulative = 0.0
+            index = len(closest_sq) - 1
+            for i, dist_sq in enumerate(closest_sq):
+                cumulative += dist_sq
+                if cumulative > target:
+                    index = i
+                    break
+        chosen.append(index)
+        new_center = normalized_data[index]
+        for i, point in enumerate(normalized_data):
+            dist_sq = distance(point, new_center)**2
+            if dist_sq < closest_sq[i]:
+                closest_sq[i] = dist_sq
+    return [list(data[index]) for index in chosen]
+
+
 def assign_clusters(centers):
+    normalized_centers = [normalize_point(center) for center in centers]
     labels = []
     wcss = 0.0
-    for point in data:
+    for point in normalized_data:
         dists = []
-        for center in centers:
+        for center in normalized_centers:
             dists.append(distance(point, center))
         min_dist = min(dists)
         labels.append(dists.index(min_dist))
@@ -58,51 +109,587 @@ def assign_clusters(centers):
 
 
 def update_centers(centers, labels):
+    n_columns = len(data[0])
+    sums = [[0.0] * n_columns for _ in centers]
+    counts = [0] * len(centers)
+    for point, label in zip(data, labels):
+        counts[label] += 1
+        cluster_sum = sums[label]
+        for i in range(n_columns):
+            cluster_sum[i] += point[i]
     for c in range(len(centers)):
-        cluster = []
-        l = 0
-        for point in  data:
-            if labels[l] == c:
-                cluster.append(point)
-            l += 1
-        if len(cluster) > 0:
-            center = []
-            for i in range(len(point)):
-                temp = 0.0
-                for j in range(len(cluster)):
-                    temp += float(cluster[j][i])
-                center.append(temp / len(cluster))
-            centers[c] = center
-
-
-def kmeans(n_clusters):
-    centers = initialize_centers(n_clusters)
+        if counts[c] > 0:
+            centers[c] = [total / counts[c] for total in sums[c]]
+
+
+def normalize_centers_array(centers):
+    minimums = np.asarray(column_min)
+    ranges = np.asarray(column_range)
+    safe_ranges = np.where(ranges == 0, 1.0, ranges)
+    normalized = (np.asarray(centers, dtype=float) - minimums) / safe_ranges
+    normalized[:, ranges == 0] = 0.0
+    return normalized
+
+
+def assign_clusters_numpy(centers, chunk_size=CHUNK_SIZE):
+    """Vectorized assign_clusters, processing `chunk_size` rows at a time."""
+    normalized_centers = normalize_centers_array(centers)
+    labels = np.empty(len(normalized_array), dtype=np.intp)
+    wcss = 0.0
+    for start in range(0, len(normalized_array), chunk_size):
+        chunk = normalized_array[start:start + chunk_size]
+        # squares summed dimension by dimension like distance(), so ties are
+        # broken the same way as in assign_clusters()
+        dists = np.zeros((len(chunk), len(normalized_centers)))
+        for i in range(chunk.shape[1]):
+            dists += (chunk[:, i, None] - normalized_centers[:, i]) ** 2
+        np.sqrt(dists, out=dists)
+        chunk_labels = dists.argmin(axis=1)
+        labels[start:start + chunk_size] = chunk_labels
+        wcss += float((dists[np.arange(len(chunk)), chunk_labels] ** 2).sum())
+    return labels, wcss
+
+
+def update_centers_numpy(centers, labels):
+    n_clusters = len(centers)
+    counts = np.bincount(labels, minlength=n_clusters)
+    sums = np.column_stack([
+        np.bincount(labels, weights=column, minlength=n_clusters)
+        for column in data_array.T
+    ])
+    for c in range(n_clusters):
+        if counts[c] > 0:
+            centers[c] = (sums[c] / counts[c]).tolist()
+
+
+def full_assignment(point, normalized_centers):
+    """Return label, distance to the closest center and to the second one."""
+    dists = [distance(point, center) for center in normalized_centers]
+    min_dist = min(dists)
+    label = dists.index(min_dist)
+    other_dists = dists[:label] + dists[label + 1:]
+    second_dist = min(other_dists) if other_dists else math.inf
+    return label, min_dist, second_dist
+
+
+def kmeans_hamerly(centers):
+    """Hamerly's triangle-inequality pruned k-means.
+
+    Every point keeps an upper bound on the distance to its own center and a
+    lower bound on the distance to any other center. Points whose bounds show
+    the label cannot change are skipped. Labels, iterations and WCSS are the
+    same as with the exhaustive assign_clusters() for the same initial
+    centers. The number of skipped distance computations per iteration is
+    stored in `pruning_stats`.
+    """
+    n_centers = len(centers)
+    normalized_centers = [normalize_point(center) for center in centers]
+    labels = []
+    upper = []
+    lower = []
+    for point in normalized_data:
+        label, min_dist, second_dist = full_assignment(point,
+                                                       normalized_centers)
+        labels.append(label)
+        upper.append(min_dist)
+        lower.append(second_dist)
+    pruning_stats[:] = [0]
+    old_labels = None
+    n_iters = 1
+    while labels != old_labels:
+        old_labels = list(labels)
+        update_centers(centers, labels)
+        old_normalized_centers = normalized_centers
+        normalized_centers = [normalize_point(center) for center in centers]
+        drifts = [distance(old, new) for old, new in
+                  zip(old_normalized_centers, normalized_centers)]
+        max_drift = max(drifts)
+        for i in range(len(upper)):
+            upper[i] += drifts[labels[i]]
+            lower[i] -= max_drift
+
+        half_separation = []
+        for c in range(n_centers):
+            others = [distance(normalized_centers[c], normalized_centers[o])
+                      for o in range(n_centers) if o != c]
+            half_separation.append(min(others) / 2 if others else math.inf)
+
+        n_iters += 1
+        computed = 0
+        for i, point in enumerate(normalized_data):
+            label = labels[i]
+            bound = max(half_separation[label], lower[i])
+            if upper[i] + BOUND_TOLERANCE < bound:
+                continue
+            upper[i] = distance(point, normalized_centers[label])
+            computed += 1
+            if upper[i] + BOUND_TOLERANCE < bound:
+                continue
+            labels[i], upper[i], lower[i] = full_assignment(point,
+                                                            normalized_centers)
+            computed += n_centers
+        pruning_stats.append(len(normalized_data) * n_centers - computed)
+
+    wcss = 0.0
+    for point, label in zip(normalized_data, labels):
+        wcss += distance(point, normalized_centers[label])**2
+    return labels, wcss, n_iters
+
+
+def kmeans(n_clusters, engine=None, algorithm="lloyd", centers=None):
+    """Run k-means; `engine` is "numpy" or "python" (the default, also for None).
+
+    The NumPy engine is opt-in, its WCSS may differ from the pure-Python
+    loops in the last digits. `algorithm="hamerly"` selects the pruned pure-Python
+    variant, see kmeans_hamerly(). Initial `centers` (raw rows) are drawn with
+    initialize_centers() unless given; the centers the run finished with are
+    left in `final_centers`.
+    """
+    if centers is None:
+        centers = initialize_centers(n_clusters)
+    else:
+        centers = [list(center) for center in centers]
+    if algorithm == "hamerly":
+        result = kmeans_hamerly(centers)
+        final_centers[:] = centers
+        return result
+    if algorithm != "lloyd":
+        raise ValueError(f"Unknown k-means algorithm: {algorithm}")
+    if engine is None:
+        engine = "python"
+    if engine == "numpy" and np is None:
+        raise ImportError("NumPy engine requested but numpy is not installed")
+    if engine not in ("numpy", "python"):
+        raise ValueError(f"Unknown k-means engine: {engine}")
     old_labels = None
     n_iters = 0
     while True:
         n_iters += 1
-        labels, wcss = assign_clusters(centers)
-        if labels == old_labels:
-            break
-        update_centers(centers, labels)
+        if engine == "numpy":
+            labels, wcss = assign_clusters_numpy(centers)
+            if old_labels is not None and np.array_equal(labels, old_labels):
+                break
+            update_centers_numpy(centers, labels)
+        else:
+            labels, wcss = assign_clusters(centers)
+            if labels == old_labels:
+                break
+            update_centers(centers, labels)
         old_labels = labels
+    if engine == "numpy":
+        labels = labels.tolist()
+    final_centers[:] = centers
     return labels, wcss, n_iters
 
 
+def init_restart_worker(shared_data, shared_normalized, minimums, ranges):
+    """Pool initializer, the dataset is sent once per worker, not per task."""
+    global data_array, normalized_array
+    data[:] = shared_data
+    normalized_data[:] = shared_normalized
+    column_min[:] = minimums
+    column_range[:] = ranges
+    if np is not None:
+        data_array = np.asarray(data, dtype=float).reshape(len(data), -1)
+        normalized_array = np.asarray(normalized_data, dtype=float).reshape(
+            len(data), -1)
+
+
+def run_restart(task):
+    n_clusters, seed, engine = task
+    start = time.perf_counter()
+    centers = initialize_centers_plus_plus(n_clusters, random.Random(seed))
+    labels, wcss, n_iters = kmeans(n_clusters, engine, centers=centers)
+    return labels, {"seed": seed, "wcss": wcss, "iterations": n_iters,
+                    "seconds": time.perf_counter() - start}
+
+
+def kmeans_restarts(n_clusters, n_init=10, seed=None, processes=None,
+                    engine=None):
+    """Run `n_init` k-means++ seeded restarts on a process pool.
+
+    Restart seeds are derived from `seed`, so results do not depend on the
+    number of processes. Returns labels, WCSS and iterations of the restart
+    with the lowest WCSS plus per-restart statistics.
+    """
+    master = random.Random(seed)
+    tasks = [(n_clusters, master.randrange(2**32), engine)
+             for _ in range(n_init)]
+    with multiprocessing.Pool(
+            processes, initializer=init_restart_worker,
+            initargs=(data, normalized_data, column_min, column_range)
+    ) as pool:
+        results = pool.map(run_restart, tasks)
+    best_labels, best_stats = min(results, key=lambda result: result[1]["wcss"])
+    restart_stats = [stats for _, stats in results]
+    return (best_labels, best_stats["wcss"], best_stats["iterations"],
+            restart_stats)
+
+
+def split_worst_cluster(centers, labels):
+    """Warm start for k + 1 clusters: add the point of the cluster with the
+    largest within-cluster sum of squares which lies farthest from its center.
+    """
+    normalized_centers = [normalize_point(center) for center in centers]
+    cluster_sse = [0.0] * len(centers)
+    farthest = [(-1.0, 0)] * len(centers)
+    for i, (point, label) in enumerate(zip(normalized_data, labels)):
+        dist = distance(point, normalized_centers[label])
+        cluster_sse[label] += dist**2
+        if dist > farthest[label][0]:
+            farthest[label] = (dist, i)
+    worst = cluster_sse.index(max(cluster_sse))
+    return [list(center) for center in centers] + \
+        [list(data[farthest[worst][1]])]
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path) as cache_file:
+            return json.load(cache_file)
+    except (IOError, ValueError):
+        return {}
+
+
+def save_cache(cache, cache_path):
+    try:
+        with open(cache_path, "w") as cache_file:
+            json.dump(cache, cache_file)
+    except IOError:
+        print(f"Could not write cache file {cache_path}")
+
+
+def sweep_k(k_min, k_max, seed=0, engine=None, cache_path=CACHE_FILE_NAME):
+    """Cluster the loaded dataset for every k in [k_min, k_max].
+
+    k_min is seeded with k-means++, every next k is warm-started from the
+    previous solution with split_worst_cluster(). Final centers are cached on
+    disk, so a repeated sweep is near-instant. Returns a list of
+    (k, wcss, iterations, cached) rows.
+    """
+    cache = load_cache(cache_path) if cache_path else {}
+    # the engines may converge differently, their results are cached apart
+    engine_name = engine or "python"
+    results = []
+    centers = None
+    labels = None
+    for k in range(k_min, k_max + 1):
+        key = f"{data_hash}:{engine_name}:{k}:{seed}:{k_min}"
+        if key in cache:
+            entry = cache[key]
+            centers = entry["centers"]
+            labels = None
+            results.append((k, entry["wcss"], entry["iterations"], True))
+            continue
+        if centers is None:
+            start_centers = initialize_centers_plus_plus(k, random.Random(seed))
+        else:
+            if labels is None:
+                labels, _ = assign_clusters(centers)
+            start_centers = split_worst_cluster(centers, labels)
+        labels, wcss, n_iters = kmeans(k, engine, centers=start_centers)
+        centers = [list(center) for center in final_centers]
+        cache[key] = {"centers": centers, "wcss": wcss, "iterations": n_iters}
+        results.append((k, wcss, n_iters, False))
+    if cache_path:
+        save_cache(cache, cache_path)
+    return results
+
+
+def print_sweep_table(results):
+    print(f"{'k':>4} {'WCSS':>20} {'Iterations':>11}")
+    for k, wcss, n_iters, cached in results:
+        print(f"{k:>4} {wcss:>20.10f} {n_iters:>11}"
+              + (" (cached)" if cached else ""))
+
+
 data = []
+normalized_data = []
+column_min = []
+column_range = []
+# skipped distance computations per iteration of the last kmeans_hamerly() run
+pruning_stats = []
+# centers of the last kmeans() run
+final_centers = []
+# sha256 of the loaded rows, used as the dataset key of the sweep cache
+data_hash = ""
+# NumPy copies of data/normalized_data, only filled when numpy is available
+data_array = None
+normalized_array = None
+# category -> one-hot position, one dict per categorical column (None otherwise)
+column_categories = []
+
+
+def category_positions(values):
+    """One-hot position of every category, in sorted order of the categories.
+
+    The order depends only on the set of categories, not on the order of the
+    rows, so shuffling the input does not change the encoding.
+    """
+    return {category: i for i, category in enumerate(sorted(values))}
+
+
+def parse_rows(rows):
+    """Convert CSV rows into a numeric matrix.
+
+    Columns which cannot be read as floats (e.g. the abalone `sex` column)
+    are treated as categorical and one-hot encoded: such a column becomes one
+    0/1 column per category, categories in sorted order.
+    """
+    n_columns = len(rows[0]) if rows else 0
+    categorical = []
+    for coord in range(n_columns):
+        try:
+            for row in rows:
+                float(row[coord])
+            categorical.append(None)
+        except ValueError:
+            categorical.append(category_positions({row[coord] for row in rows}))
+    matrix = [parse_row(row, categorical) for row in rows]
+    return matrix, categorical
+
+
+def parse_row(row, categorical):
+    parsed_row = []
+    for coord, val in enumerate(row):
+        categories = categorical[coord]
+        if categories is None:
+            parsed_row.append(float(val))
+        else:
+            one_hot = [0.0] * len(categories)
+            one_hot[categories[val]] = 1.0
+            parsed_row.extend(one_hot)
+    return parsed_row
+
+
+def prepare_data(rows):
+    """Parse rows once and precompute per-column min/range and normalized data."""
+    global data_hash
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(",".join(row).encode())
+        digest.update(b"\n")
+    data_hash = digest.hexdigest()
+    matrix, categorical = parse_rows(rows)
+    data[:] = matrix
+    column_categories[:] = categorical
+    column_min[:] = [min(column) for column in zip(*data)]
+    column_range[:] = [max(column) - min_val for column, min_val in
+                       zip(zip(*data), column_min)]
+    normalized_data[:] = [normalize_point(point) for point in data]
+    if np is not None:
+        global data_array, normalized_array
+        data_array = np.asarray(data, dtype=float).reshape(len(data), -1)
+        normalized_array = np.asarray(normalized_data, dtype=float).reshape(
+            len(data), -1)
+
+
+def read_batches(path, batch_size):
+    """Yield the non-empty rows of a CSV file in lists of `batch_size`."""
+    with open(path, newline="") as csv_file:
+        batch = []
+        for row in csv.reader(csv_file):
+            if not row:
+                continue
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def prepare_streaming(path, batch_size):
+    """Compute column categories, min and range in one streaming pass.
+
+    Columns are classified as numeric or categorical from the first row.
+    The categories are collected during the pass and one-hot encoded in
+    sorted order, as in parse_rows. Returns the categories, minimums and
+    ranges; the globals of a loaded dataset are not touched.
+    """
+    categorical = None
+    minimums = None
+    maximums = None
+    for batch in read_batches(path, batch_size):
+        if categorical is None:
+            categorical = []
+            for val in batch[0]:
+                try:
+                    float(val)
+                    categorical.append(None)
+                except ValueError:
+                    categorical.append(set())
+            minimums = [math.inf] * len(categorical)
+            maximums = [-math.inf] * len(categorical)
+        for row in batch:
+            for coord, val in enumerate(row):
+                if categorical[coord] is not None:
+                    categorical[coord].add(val)
+                    continue
+                val = float(val)
+                if val < minimums[coord]:
+                    minimums[coord] = val
+                if val > maximums[coord]:
+                    maximums[coord] = val
+    if categorical is None:
+        raise ValueError(f"No data in {path}")
+    categorical = [None if values is None else category_positions(values)
+                   for values in categorical]
+    column_minimums = []
+    ranges = []
+    for coord, categories in enumerate(categorical):
+        if categories is None:
+            column_minimums.append(minimums[coord])
+            ranges.append(maximums[coord] - minimums[coord])
+        else:
+            # every one-hot column holds both 0 and 1 unless there is a single category
+            column_minimums.extend([0.0] * len(categories))
+            ranges.extend([1.0 if len(categories) > 1 else 0.0] * len(categories))
+    return categorical, column_minimums, ranges
+
+
+def closest_center(point, normalized_centers):
+    dists = [distance(point, center) for center in normalized_centers]
+    min_dist = min(dists)
+    return dists.index(min_dist), min_dist
+
+
+def kmeans_streaming(path, n_clusters, batch_size=10000, n_epochs=1,
+                     labels_path=None):
+    """Mini-batch k-means over a CSV file read in chunks of `batch_size`.
+
+    Only one batch is held in memory at a time. Centers live in normalized
+    space and move towards the points of each batch with a per-center
+    learning rate of 1 / (points seen by the center). A final pass assigns
+    labels and computes WCSS; labels are written to `labels_path` (one per
+    line) when given. Returns cluster sizes, WCSS and the normalized centers.
+    """
+    categorical, minimums, ranges = prepare_streaming(path, batch_size)
+    normalized_centers = None
+    seen = [0] * n_clusters
+    for _ in range(n_epochs):
+        for batch in read_batches(path, batch_size):
+            points = [normalize_with(parse_row(row, categorical), minimums,
+                                     ranges) for row in batch]
+            if normalized_centers is None:
+                if len(points) < n_clusters:
+                    raise ValueError("batch_size must be at least n_clusters")
+                normalized_centers = [list(point) for point in
+                                      random.sample(points, n_clusters)]
+            labels = [closest_center(point, normalized_centers)[0]
+                      for point in points]
+            for point, label in zip(points, labels):
+                seen[label] += 1
+                learning_rate = 1.0 / seen[label]
+                center = normalized_centers[label]
+                for i in range(len(center)):
+                    center[i] += learning_rate * (point[i] - center[i])
+
+    sizes = [0] * n_clusters
+    wcss = 0.0
+    labels_file = open(labels_path, "w") if labels_path else None
+    try:
+        for batch in read_batches(path, batch_size):
+            for row in batch:
+                point = normalize_with(parse_row(row, categorical), minimums,
+                                       ranges)
+                label, min_dist = closest_center(point, normalized_centers)
+                sizes[label] += 1
+                wcss += min_dist**2
+                if labels_file:
+                    labels_file.write(f"{label}\n")
+    finally:
+        if labels_file:
+            labels_file.close()
+    return sizes, wcss, normalized_centers
+
+
+def load_data(path=DATA_FILE_NAME):
+    """Read the CSV file at `path` and prepare it for clustering."""
+    try:
+        with open(path, newline="") as data_file:
+            rows = [row for row in csv.reader(data_file) if row]
+    except IOError as error:
+        raise SystemExit(f"Cannot read data file '{path}': {error}")
+    if not rows:
+        raise SystemExit(f"Data file '{path}' is empty")
+    prepare_data(rows)
+
+
+def positive_int(val):
+    try:
+        int_value = int(val)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{val}' should be NUMBER not text")
+    if int_value <= 0:
+        raise argparse.ArgumentTypeError(f"'{val}' should be positive integer.")
+    return int_value
+
+
+def argument_parse():
+    parser = argparse.ArgumentParser(description="K-means clustering.")
+    parser.add_argument("-f", "--file", default=DATA_FILE_NAME,
+                        help="CSV file with data", metavar="FILE")
+    parser.add_argument("-k", "--clusters", type=int, default=N_CLUSTERS,
+                        help="Number of clusters", metavar="NUM")
+    parser.add_argument("-e", "--engine", choices=["numpy", "python"],
+                        default="python", help="Computation engine")
+    parser.add_argument("-a", "--algorithm", choices=["lloyd", "hamerly"],
+                        default="lloyd", help="Assignment algorithm")
+    parser.add_argument("--n-init", type=int, default=1,
+                        help="Number of parallel k-means++ restarts",
+                        metavar="NUM")
+    parser.add_argument("--sweep", type=int, nargs=2,
+                        metavar=("K_MIN", "K_MAX"),
+                        help="Print WCSS for every k in [K_MIN, K_MAX]")
+    parser.add_argument("--stream", action="store_true",
+                        help="Mini-batch k-means reading the file in batches")
+    parser.add_argument("--batch-size", type=positive_int, default=10000,
+                        help="Rows per batch of --stream", metavar="NUM")
+    parser.add_argument("--epochs", type=positive_int, default=1,
+                        help="Passes over the file with --stream",
+                        metavar="NUM")
+    parser.add_argument("-s", "--seed", type=int, help="Random seed")
+    return parser.parse_args()
 
 
-def load_data():
-    data_reader = csv.reader(file)
-    for row in data_reader:
-        data.append(row)
-    labels, wcss, n_iters = kmeans(3)
+def main():
+    args = argument_parse()
+    if args.stream:
+        random.seed(args.seed)
+        try:
+            sizes, wcss, _ = kmeans_streaming(args.file, args.clusters,
+                                              args.batch_size, args.epochs)
+        except (IOError, ValueError) as error:
+            raise SystemExit(f"Cannot cluster data file '{args.file}': {error}")
+        print("Cluster sizes:")
+        for c, size in enumerate(sizes):
+            print(f"{c + 1} -", size)
+        print("Epochs:", args.epochs)
+        print("WCSS:", wcss)
+        return
+    load_data(args.file)
+    if args.sweep:
+        seed = args.seed if args.seed is not None else 0
+        print_sweep_table(sweep_k(args.sweep[0], args.sweep[1], seed,
+                                  args.engine))
+        return
+    if args.n_init > 1:
+        labels, wcss, n_iters, _ = kmeans_restarts(
+            args.clusters, args.n_init, args.seed, engine=args.engine)
+    else:
+        random.seed(args.seed)
+        labels, wcss, n_iters = kmeans(args.clusters, args.engine,
+                                       args.algorithm)
     print("Cluster sizes:")
-    for c in range(3):
+    for c in range(args.clusters):
         print(f"{c + 1} -", labels.count(c))
     print("Iterations:", n_iters)
     print("WCSS:", wcss)
+    if args.algorithm == "hamerly" and args.n_init == 1:
+        print("Skipped distance computations per iteration:",
+              " ".join(str(skipped) for skipped in pruning_stats))
 
 
-load_data()
-file.close()
+if __name__ == "__main__":
+    main()
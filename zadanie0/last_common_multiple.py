@@ -1,35 +1,160 @@
 import math
+import random
 from collections import Counter
+from functools import lru_cache, reduce
+
+# numbers below this limit are factored with the smallest prime factor table
+SPF_LIMIT = 1 << 20
+FACTOR_CACHE_SIZE = 4096
+# Miller-Rabin with these bases is deterministic for n < 3.3 * 10**24
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+smallest_prime_factor = []
+# own generator, factoring must not change the state of the caller's random
+_rng = random.Random()
+
+
+def build_spf_table():
+    """Smallest prime factor of every number below SPF_LIMIT."""
+    table = list(range(SPF_LIMIT))
+    for i in range(2, math.isqrt(SPF_LIMIT - 1) + 1):
+        if table[i] == i:
+            for j in range(i * i, SPF_LIMIT, i):
+                if table[j] == j:
+                    table[j] = i
+    smallest_prime_factor[:] = table
+
+
+def is_probable_prime(n):
+    if n < 2:
+        return False
+    for p in MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def pollard_rho(n):
+    """A non-trivial divisor of the odd composite `n` (Brent's variant)."""
+    while True:
+        y = _rng.randrange(1, n)
+        c = _rng.randrange(1, n)
+        m = 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def factor_into(n, factors):
+    if n == 1:
+        return
+    if n < SPF_LIMIT:
+        if not smallest_prime_factor:
+            build_spf_table()
+        while n > 1:
+            p = smallest_prime_factor[n]
+            factors[p] += 1
+            n //= p
+        return
+    for p in (2, 3, 5, 7, 11, 13):
+        while n % p == 0:
+            factors[p] += 1
+            n //= p
+    if n == 1:
+        return
+    if is_probable_prime(n):
+        factors[n] += 1
+        return
+    divisor = pollard_rho(n)
+    factor_into(divisor, factors)
+    factor_into(n // divisor, factors)
+
+
+@lru_cache(maxsize=FACTOR_CACHE_SIZE)
+def cached_factorization(n):
+    factors = Counter()
+    factor_into(n, factors)
+    return tuple(sorted(factors.items()))
 
 
 def prime_factors(n):
     if not is_integer(n):
         raise ValueError("You number have to be integer")
-    factors = Counter()
-    for i in range(2, round(math.sqrt(n)) + 1):
-        while n % i == 0:
-            factors[i] += 1
-            n = n // i
+    n = int(n)
     if n < 1:
         raise ValueError("Number can not be lower than 1")
-    if n > 1:
-        factors[n] = factors.get(n, 0) + 1
-    return factors
+    # a new Counter every call, so callers cannot modify the cached result
+    return Counter(dict(cached_factorization(n)))
 
 
 def is_integer(num):
     return num == int(num)
 
 
+def validate(num):
+    if not is_integer(num):
+        raise ValueError("You number have to be integer")
+    num = int(num)
+    if num < 1:
+        raise ValueError("Number can not be lower than 1")
+    return num
+
+
 def lcm(a, b):
-    factors_a = prime_factors(a)
-    factors_b = prime_factors(b)
-    lcm_factors = factors_a | factors_b
+    a = validate(a)
+    b = validate(b)
+    return a // math.gcd(a, b) * b
+
+
+def lcm_many(numbers):
+    """Least common multiple of all numbers, reduced pairwise with gcd."""
+    return reduce(lcm, numbers, 1)
+
 
-    lcm_value = 1
-    for lcm_factors_keys, lcm_factors_values in lcm_factors.items():
-        lcm_value *= lcm_factors_keys ** lcm_factors_values
-    return lcm_value
+def gcd_many(numbers):
+    """Greatest common divisor of all numbers, stops early once it is 1."""
+    result = 0
+    for num in numbers:
+        result = math.gcd(result, validate(num))
+        if result == 1:
+            break
+    if result == 0:
+        raise ValueError("gcd of an empty collection is undefined")
+    return result
 
 
-print(lcm(192, 348))
+if __name__ == "__main__":
+    print(lcm(192, 348))
@@ -1,15 +1,112 @@
+import math
+import multiprocessing
+
 amount_of_numbers = 100
+# odd numbers per segment, one byte each, sized to stay in the CPU cache
+SEGMENT_SIZE = 1 << 18
 
 
 def sieve_of_eratosthenes(primes_to_this_number):
-    tab = [True] * primes_to_this_number
-    primes = []
-    for i in range(2, primes_to_this_number):
+    return list(primes_in_range(2, primes_to_this_number))
+
+
+def base_primes(limit):
+    """Primes up to and including `limit`, from a plain odd-only sieve."""
+    if limit < 2:
+        return []
+    # index i stands for the odd number 2 * i + 1
+    tab = bytearray([1]) * (limit // 2 + 1)
+    tab[0] = 0
+    for i in range(1, (math.isqrt(limit) - 1) // 2 + 1):
         if tab[i]:
-            primes.append(i)
-            for j in range(i * i, primes_to_this_number, i):
-                tab[j] = False
+            p = 2 * i + 1
+            tab[p * p // 2::p] = bytes(len(range(p * p // 2, len(tab), p)))
+    primes = [2]
+    primes.extend(2 * i + 1 for i in range(1, len(tab)) if tab[i]
+                  and 2 * i + 1 <= limit)
     return primes
 
 
-print(f"Prime numbers to {amount_of_numbers} {sieve_of_eratosthenes(amount_of_numbers)}")
+def sieve_segment(low, high, primes):
+    """Sieve the odd numbers in [low, high).
+
+    Returns the first odd number of the segment and a bytearray in which
+    index i is 1 when that number + 2 * i is prime. `primes` must contain the
+    odd primes up to sqrt(high).
+    """
+    first_odd = low | 1
+    size = max(0, (high - first_odd + 1) // 2)
+    segment = bytearray([1]) * size
+    for p in primes:
+        if p == 2:
+            continue
+        if p * p >= high:
+            break
+        multiple = max(p * p, (low + p - 1) // p * p)
+        if multiple % 2 == 0:
+            multiple += p
+        start = (multiple - first_odd) // 2
+        if start < size:
+            segment[start::p] = bytes(len(range(start, size, p)))
+    if first_odd == 1 and size:
+        # 1 is not a prime
+        segment[0] = 0
+    return first_odd, segment
+
+
+def segments(a, b, segment_size=SEGMENT_SIZE):
+    step = 2 * segment_size
+    return [(low, min(low + step, b)) for low in range(a, b, step)]
+
+
+def primes_in_range(a, b, segment_size=SEGMENT_SIZE):
+    """Lazily yield the primes in [a, b), one segment at a time."""
+    a = max(a, 2)
+    if a >= b:
+        return
+    primes = base_primes(math.isqrt(b - 1))
+    if a <= 2:
+        yield 2
+    for low, high in segments(a, b, segment_size):
+        first_odd, segment = sieve_segment(low, high, primes)
+        for i, is_prime in enumerate(segment):
+            if is_prime:
+                yield first_odd + 2 * i
+
+
+# base primes of the current count_primes() call, set once per pool worker
+segment_base_primes = []
+
+
+def init_count_worker(primes):
+    segment_base_primes[:] = primes
+
+
+def count_segment(bounds):
+    low, high = bounds
+    return sieve_segment(low, high, segment_base_primes)[1].count(1)
+
+
+def count_primes(a, b, processes=1, segment_size=SEGMENT_SIZE):
+    """Number of primes in [a, b).
+
+    With `processes` other than 1 the disjoint segments are counted in a
+    multiprocessing pool (None means one process per CPU).
+    """
+    a = max(a, 2)
+    if a >= b:
+        return 0
+    primes = base_primes(math.isqrt(b - 1))
+    tasks = segments(a, b, segment_size)
+    if processes == 1:
+        init_count_worker(primes)
+        counts = map(count_segment, tasks)
+        return sum(counts) + (1 if a <= 2 else 0)
+    with multiprocessing.Pool(processes, initializer=init_count_worker,
+                              initargs=(primes,)) as pool:
+        counts = pool.imap_unordered(count_segment, tasks, chunksize=16)
+        return sum(counts) + (1 if a <= 2 else 0)
+
+
+if __name__ == "__main__":
+    print(f"Prime numbers to {amount_of_numbers} {sieve_of_eratosthenes(amount_of_numbers)}")
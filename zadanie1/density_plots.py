@@ -0,0 +1,214 @@
+"""Binned pair density and histogram panels of the abalone data.
+
+Instead of drawing every point like the notebook's scatterplots, the CSV is
+read in chunks twice: once for the column ranges and once to count all 28
+column pairs into 2D bins and every column into histogram bins, with one
+numpy bincount per chunk. The panels are rendered from the bin counts on a
+multiprocessing pool and cached as PNG files keyed by the data hash and the
+binning parameters, so an unchanged report is regenerated without reading
+the data again. report.html shows the panels in the notebook's layout.
+"""
+
+import argparse
+import hashlib
+import html
+import multiprocessing
+import os
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.colors import LogNorm
+
+from streaming_stats import CHUNK_SIZE, DATA_FILE_NAME, NUMERIC_COLUMNS, read_chunks
+
+PAIR_BINS = 100
+HIST_BINS = 30
+OUTPUT_DIR = "report"
+PANEL_DPI = 80
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as data_file:
+        for block in iter(lambda: data_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_arrays(path, chunk_size=CHUNK_SIZE):
+    """Numeric columns of the file as float arrays, one chunk at a time."""
+    for lines in read_chunks(path, chunk_size):
+        yield np.loadtxt(lines, delimiter=",",
+                         usecols=range(1, len(NUMERIC_COLUMNS) + 1), ndmin=2)
+
+
+def column_ranges(path, chunk_size=CHUNK_SIZE):
+    minimum = np.full(len(NUMERIC_COLUMNS), np.inf)
+    maximum = np.full(len(NUMERIC_COLUMNS), -np.inf)
+    for chunk in read_arrays(path, chunk_size):
+        minimum = np.minimum(minimum, chunk.min(axis=0))
+        maximum = np.maximum(maximum, chunk.max(axis=0))
+    # a constant column still gets bins of non zero width
+    maximum = np.where(maximum > minimum, maximum, minimum + 1)
+    return minimum, maximum
+
+
+def bin_indices(chunk, minimum, maximum, bins):
+    scaled = (chunk - minimum) / (maximum - minimum) * bins
+    return np.clip(scaled.astype(np.int64), 0, bins - 1)
+
+
+def pair_list():
+    k = len(NUMERIC_COLUMNS)
+    return [(i, j) for i in range(k) for j in range(i + 1, k)]
+
+
+def bin_data(path, pair_bins=PAIR_BINS, hist_bins=HIST_BINS,
+             chunk_size=CHUNK_SIZE):
+    """Counts of every column pair and every column in one pass after the ranges.
+
+    Returns the ranges, pair counts of shape (pairs, pair_bins, pair_bins)
+    indexed [pair, x bin, y bin] and histogram counts (columns, hist_bins).
+    """
+    minimum, maximum = column_ranges(path, chunk_size)
+    pairs = pair_list()
+    first = np.array([i for i, _ in pairs])
+    second = np.array([j for _, j in pairs])
+    # pair p, bins (x, y) -> p * pair_bins**2 + x * pair_bins + y
+    pair_offsets = np.arange(len(pairs))[:, None] * pair_bins * pair_bins
+    hist_offsets = np.arange(len(NUMERIC_COLUMNS))[:, None] * hist_bins
+    pair_counts = np.zeros(len(pairs) * pair_bins * pair_bins, dtype=np.int64)
+    hist_counts = np.zeros(len(NUMERIC_COLUMNS) * hist_bins, dtype=np.int64)
+    for chunk in read_arrays(path, chunk_size):
+        index = bin_indices(chunk, minimum, maximum, pair_bins).T
+        flat = pair_offsets + index[first] * pair_bins + index[second]
+        pair_counts += np.bincount(flat.ravel(), minlength=pair_counts.size)
+        index = bin_indices(chunk, minimum, maximum, hist_bins).T
+        hist_counts += np.bincount((hist_offsets + index).ravel(),
+                                   minlength=hist_counts.size)
+    return (minimum, maximum,
+            pair_counts.reshape(len(pairs), pair_bins, pair_bins),
+            hist_counts.reshape(len(NUMERIC_COLUMNS), hist_bins))
+
+
+def render_pair(task):
+    path, x_name, y_name, counts, extent = task
+    fig, ax = plt.subplots(figsize=(6, 4.5))
+    image = ax.imshow(np.ma.masked_equal(counts.T, 0), origin="lower",
+                      extent=extent, aspect="auto", norm=LogNorm(),
+                      cmap="viridis", interpolation="nearest")
+    fig.colorbar(image, ax=ax, label="Count")
+    ax.set_title(f"{x_name} vs {y_name}")
+    ax.set_xlabel(x_name)
+    ax.set_ylabel(y_name)
+    fig.tight_layout()
+    fig.savefig(path, dpi=PANEL_DPI)
+    plt.close(fig)
+    return path
+
+
+def render_histogram(task):
+    path, name, counts, low, high = task
+    edges = np.linspace(low, high, len(counts) + 1)
+    fig, ax = plt.subplots(figsize=(6, 4.5))
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge",
+           color="skyblue", edgecolor="black")
+    ax.set_title(name)
+    ax.set_xlabel("Value")
+    ax.set_ylabel("Frequency")
+    ax.grid(axis="y")
+    fig.tight_layout()
+    fig.savefig(path, dpi=PANEL_DPI)
+    plt.close(fig)
+    return path
+
+
+def render_task(task):
+    kind, arguments = task
+    return render_pair(arguments) if kind == "pair" else render_histogram(arguments)
+
+
+def panel_paths(cache_dir, data_hash, pair_bins, hist_bins):
+    """Cache file of every panel, named by data hash and binning parameters."""
+    key = data_hash[:16]
+    hist_paths = [os.path.join(cache_dir, f"{key}_hist_b{hist_bins}_{i}.png")
+                  for i in range(len(NUMERIC_COLUMNS))]
+    pair_paths = [os.path.join(cache_dir, f"{key}_pair_b{pair_bins}_{i}_{j}.png")
+                  for i, j in pair_list()]
+    return hist_paths, pair_paths
+
+
+def render_panels(path, output_dir=OUTPUT_DIR, pair_bins=PAIR_BINS,
+                  hist_bins=HIST_BINS, processes=None, chunk_size=CHUNK_SIZE):
+    """Render missing panels in parallel, returns histogram and pair panel paths."""
+    cache_dir = os.path.join(output_dir, "panels")
+    os.makedirs(cache_dir, exist_ok=True)
+    hist_paths, pair_paths = panel_paths(cache_dir, file_hash(path),
+                                         pair_bins, hist_bins)
+    if all(os.path.exists(p) for p in hist_paths + pair_paths):
+        return hist_paths, pair_paths
+    minimum, maximum, pair_counts, hist_counts = bin_data(
+        path, pair_bins, hist_bins, chunk_size)
+    tasks = []
+    for i, panel in enumerate(hist_paths):
+        if not os.path.exists(panel):
+            tasks.append(("hist", (panel, NUMERIC_COLUMNS[i], hist_counts[i],
+                                   minimum[i], maximum[i])))
+    for p, ((i, j), panel) in enumerate(zip(pair_list(), pair_paths)):
+        if not os.path.exists(panel):
+            extent = (minimum[i], maximum[i], minimum[j], maximum[j])
+            tasks.append(("pair", (panel, NUMERIC_COLUMNS[i], NUMERIC_COLUMNS[j],
+                                   pair_counts[p], extent)))
+    if processes == 1:
+        for task in tasks:
+            render_task(task)
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            pool.map(render_task, tasks)
+    return hist_paths, pair_paths
+
+
+def write_report(output_dir, hist_paths, pair_paths):
+    """report.html with the histograms and the pair panels two per row."""
+    def images(paths):
+        return "\n".join(
+            f'<img src="{html.escape(os.path.relpath(p, output_dir))}" width="48%">'
+            for p in paths)
+    report_path = os.path.join(output_dir, "report.html")
+    with open(report_path, "w") as report:
+        report.write("<!DOCTYPE html>\n<html>\n<head><meta charset=\"UTF-8\">"
+                     "<title>Abalone EDA</title></head>\n<body>\n"
+                     f"<h1>Histograms</h1>\n{images(hist_paths)}\n"
+                     f"<h1>Pair densities</h1>\n{images(pair_paths)}\n"
+                     "</body>\n</html>\n")
+    return report_path
+
+
+def argument_parse():
+    parser = argparse.ArgumentParser(description="Binned abalone EDA plots.")
+    parser.add_argument("-f", "--file", default=DATA_FILE_NAME,
+                        help="CSV file with data", metavar="FILE")
+    parser.add_argument("-o", "--output", default=OUTPUT_DIR,
+                        help="Report directory, panels are cached in it",
+                        metavar="DIR")
+    parser.add_argument("-b", "--bins", type=int, default=PAIR_BINS,
+                        help="Bins per axis of the pair panels", metavar="NUM")
+    parser.add_argument("--hist-bins", type=int, default=HIST_BINS,
+                        help="Bins of the histograms", metavar="NUM")
+    parser.add_argument("-p", "--processes", type=int, default=0,
+                        help="Rendering processes, 0 means one per CPU",
+                        metavar="NUM")
+    return parser.parse_args()
+
+
+def main():
+    args = argument_parse()
+    hist_paths, pair_paths = render_panels(args.file, args.output, args.bins,
+                                           args.hist_bins, args.processes or None)
+    print(write_report(args.output, hist_paths, pair_paths))
+
+
+if __name__ == "__main__":
+    main()
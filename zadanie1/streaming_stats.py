@@ -0,0 +1,266 @@
+"""Single pass statistics of the abalone data.
+
+Computes what zadanie1.ipynb gets from pandas (Sex value_counts, describe()
+and the Pearson corr() matrix) in one chunked pass over the CSV, without
+loading the file into memory. Every chunk gives a StreamingStats partial
+result and partial results are merged, so chunks can be processed by a
+multiprocessing pool.
+"""
+
+import argparse
+import csv
+import math
+import multiprocessing
+from collections import Counter
+from itertools import islice
+
+DATA_FILE_NAME = "data.csv"
+COLUMNS = ["Sex", "Length", "Diameter", "Height", "Whole weight",
+           "Shucked weight", "Viscera weight", "Shell weight", "Rings"]
+NUMERIC_COLUMNS = COLUMNS[1:]
+SEX_NAMES = {"M": "Male", "F": "Female", "I": "Infant"}
+CHUNK_SIZE = 65536
+# distinct values kept exactly per column, above it the sketch compresses
+SKETCH_SIZE = 10000
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class QuantileSketch:
+    """Value -> count histogram, compressed to weighted centroids when large.
+
+    While a column has at most `size` distinct values the quantiles are exact
+    (pandas' linear interpolation). Beyond that adjacent values are merged
+    into `size` centroids of about equal weight, so the rank error of a
+    quantile stays around n / size.
+    """
+    def __init__(self, size=SKETCH_SIZE):
+        self.size = size
+        self.counts = Counter()
+
+    def add(self, value):
+        self.counts[value] += 1
+        if len(self.counts) > 2 * self.size:
+            self.compress()
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        if len(self.counts) > 2 * self.size:
+            self.compress()
+
+    def compress(self):
+        items = sorted(self.counts.items())
+        total = sum(count for _, count in items)
+        step = total / self.size
+        compressed = Counter()
+        weight = 0
+        weighted_sum = 0.0
+        for value, count in items:
+            weight += count
+            weighted_sum += value * count
+            if weight >= step:
+                compressed[weighted_sum / weight] += weight
+                weight = 0
+                weighted_sum = 0.0
+        if weight:
+            compressed[weighted_sum / weight] += weight
+        self.counts = compressed
+
+    def quantiles(self, fractions):
+        """Quantiles with linear interpolation between the closest ranks.
+
+        An empty sketch gives NaN, as pandas does for an empty column.
+        """
+        items = sorted(self.counts.items())
+        n = sum(count for _, count in items)
+        if n == 0:
+            return [math.nan] * len(fractions)
+        results = []
+        for fraction in fractions:
+            position = (n - 1) * fraction
+            low = math.floor(position)
+            low_value = self.value_at(items, low)
+            high_value = self.value_at(items, min(low + 1, n - 1))
+            results.append(low_value + (position - low) * (high_value - low_value))
+        return results
+
+    @staticmethod
+    def value_at(items, rank):
+        seen = 0
+        for value, count in items:
+            seen += count
+            if rank < seen:
+                return value
+        return items[-1][0]
+
+
+class StreamingStats:
+    """Mergeable count, mean, co-moments, min, max and quantile sketches.
+
+    Means and co-moments are updated with Welford's method, partial results
+    are combined with the pairwise formula of Chan et al., so the variances
+    and correlations do not suffer from the cancellation of sum of squares.
+    """
+    def __init__(self, sketch_size=SKETCH_SIZE):
+        k = len(NUMERIC_COLUMNS)
+        self.n = 0
+        self.mean = [0.0] * k
+        # co_moment[i][j] = sum of (x_i - mean_i) * (x_j - mean_j), i <= j
+        self.co_moment = [[0.0] * k for _ in range(k)]
+        self.minimum = [math.inf] * k
+        self.maximum = [-math.inf] * k
+        self.sketches = [QuantileSketch(sketch_size) for _ in range(k)]
+        self.sex_counts = Counter()
+
+    def update(self, row):
+        """Add one parsed row: (sex, [numeric values])."""
+        sex, values = row
+        self.sex_counts[SEX_NAMES.get(sex, sex)] += 1
+        self.n += 1
+        mean = self.mean
+        k = len(values)
+        delta = [values[i] - mean[i] for i in range(k)]
+        for i in range(k):
+            mean[i] += delta[i] / self.n
+        for i in range(k):
+            row_moment = self.co_moment[i]
+            for j in range(i, k):
+                row_moment[j] += delta[i] * (values[j] - mean[j])
+            value = values[i]
+            if value < self.minimum[i]:
+                self.minimum[i] = value
+            if value > self.maximum[i]:
+                self.maximum[i] = value
+            self.sketches[i].add(value)
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        k = len(self.mean)
+        delta = [other.mean[i] - self.mean[i] for i in range(k)]
+        factor = self.n * other.n / n
+        for i in range(k):
+            for j in range(i, k):
+                self.co_moment[i][j] += other.co_moment[i][j] + delta[i] * delta[j] * factor
+            self.mean[i] += delta[i] * other.n / n
+            self.minimum[i] = min(self.minimum[i], other.minimum[i])
+            self.maximum[i] = max(self.maximum[i], other.maximum[i])
+            self.sketches[i].merge(other.sketches[i])
+        self.n = n
+        self.sex_counts.update(other.sex_counts)
+        return self
+
+    def std(self, i):
+        """Sample standard deviation (ddof=1, as in pandas)."""
+        return math.sqrt(self.co_moment[i][i] / (self.n - 1)) if self.n > 1 else math.nan
+
+    def describe(self):
+        """Rows of pandas' describe().T: column -> statistics.
+
+        Without any rows everything but the count is NaN, as in pandas.
+        """
+        table = {}
+        for i, column in enumerate(NUMERIC_COLUMNS):
+            quartiles = self.sketches[i].quantiles(QUANTILES)
+            if self.n:
+                mean, minimum, maximum = self.mean[i], self.minimum[i], self.maximum[i]
+            else:
+                mean = minimum = maximum = math.nan
+            table[column] = {"count": self.n, "mean": mean,
+                             "std": self.std(i), "min": minimum,
+                             "25%": quartiles[0], "50%": quartiles[1],
+                             "75%": quartiles[2], "max": maximum}
+        return table
+
+    def correlation(self):
+        """Pearson correlation matrix as nested lists in NUMERIC_COLUMNS order."""
+        k = len(self.mean)
+        matrix = [[1.0] * k for _ in range(k)]
+        for i in range(k):
+            for j in range(i + 1, k):
+                denominator = math.sqrt(self.co_moment[i][i] * self.co_moment[j][j])
+                value = self.co_moment[i][j] / denominator if denominator else math.nan
+                matrix[i][j] = matrix[j][i] = value
+        return matrix
+
+    def value_counts(self):
+        """Sex counts and percentages, most frequent first."""
+        return [(name, count, round(count / self.n * 100, 2))
+                for name, count in self.sex_counts.most_common()]
+
+
+def parse_row(fields):
+    return fields[0], [float(value) for value in fields[1:]]
+
+
+def chunk_stats(lines):
+    """StreamingStats of one chunk of raw CSV lines."""
+    stats = StreamingStats()
+    for fields in csv.reader(lines):
+        if fields:
+            stats.update(parse_row(fields))
+    return stats
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    with open(path, newline="") as csv_file:
+        while True:
+            lines = list(islice(csv_file, chunk_size))
+            if not lines:
+                return
+            yield lines
+
+
+def compute_stats(path, chunk_size=CHUNK_SIZE, processes=1):
+    """Statistics of the whole file in one pass.
+
+    With `processes` other than 1 the chunks are processed on a
+    multiprocessing pool (None means one process per CPU).
+    """
+    stats = StreamingStats()
+    chunks = read_chunks(path, chunk_size)
+    if processes == 1:
+        for lines in chunks:
+            stats.merge(chunk_stats(lines))
+        return stats
+    with multiprocessing.Pool(processes) as pool:
+        for partial in pool.imap(chunk_stats, chunks):
+            stats.merge(partial)
+    return stats
+
+
+def print_stats(stats):
+    print(f"{'':<16} {'count':>6} {'%':>7}")
+    for name, count, percent in stats.value_counts():
+        print(f"{name:<16} {count:>6} {percent:>7.2f}")
+    print()
+    names = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    print(f"{'':<16}" + "".join(f"{name:>10}" for name in names))
+    for column, row in stats.describe().items():
+        print(f"{column:<16}" + "".join(f"{row[name]:>10.5f}" for name in names))
+    print()
+    print(f"{'':<16}" + "".join(f"{column[:9]:>10}" for column in NUMERIC_COLUMNS))
+    for column, row in zip(NUMERIC_COLUMNS, stats.correlation()):
+        print(f"{column:<16}" + "".join(f"{value:>10.5f}" for value in row))
+
+
+def argument_parse():
+    parser = argparse.ArgumentParser(description="Streaming abalone statistics.")
+    parser.add_argument("-f", "--file", default=DATA_FILE_NAME,
+                        help="CSV file with data", metavar="FILE")
+    parser.add_argument("-c", "--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="Lines per chunk", metavar="NUM")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                        help="Worker processes, 0 means one per CPU",
+                        metavar="NUM")
+    return parser.parse_args()
+
+
+def main():
+    args = argument_parse()
+    print_stats(compute_stats(args.file, args.chunk_size,
+                              args.processes or None))
+
+
+if __name__ == "__main__":
+    main()
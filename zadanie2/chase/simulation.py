@@ -1,11 +1,24 @@
 import argparse
+import array
 import configparser
 import csv
 import json
 import math
 import random
 import logging
+import multiprocessing
 import os
+import queue
+import struct
+import threading
+import time
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Constants OR Global Var
 MAX_ROUNDS = 50
@@ -15,28 +28,54 @@ DISTANCE_OF_WOLF_MOVEMENT = 1.0
 MAX_INIT_POSITION = 10.0
 CONFIG_FILE_NAME = ""
 JSON_FILE_NAME = "pos.json"
+POSITIONS_FILE_NAME = "pos.ndjson"
+# round number and byte offset of every round in the position log, one
+# record per written round (rounds dropped by the background writer have none)
+INDEX_SUFFIX = ".idx"
+INDEX_FORMAT = "<QQ"
+INDEX_RECORD_SIZE = struct.calcsize(INDEX_FORMAT)
+# rounds waiting for the background writer before the simulation is throttled
+OUTPUT_QUEUE_SIZE = 256
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 CSV_FILE_NAME = "alive.csv"
-
-logger = None
+SURVIVAL_FILE_NAME = "survival.csv"
+PROFILE_FILE_NAME = "profile.csv"
+PROFILE_SUMMARY_FILE_NAME = "profile.txt"
+CHECKPOINT_FILE_NAME = "chase.ckpt"
+CHECKPOINT_MAGIC = b"CHASECK2"
+# round, max rounds, sheep, counter of sheep, alive sheep, array herd flag,
+# max init position, sheep move, wolf move, wolf x, wolf y, chased sheep
+# number (0 = none), size of the position log, its index and the csv file
+CHECKPOINT_HEADER = struct.Struct("<QQQQQ?dddddqQQQ")
+
+logger = logging.getLogger()
+# cached logger.isEnabledFor(DEBUG), guards the per-sheep debug calls
+debug_logging = False
+# QueueListener writing chase.log when logging runs in the background
+log_listener = None
 
 
 class Animal:
-    def __init__(self, x: float, y: float, jump_value: float, name):
+    def __init__(self, x: float, y: float, jump_value: float, name,
+                 rng=random):
         """
          Init of an animal representation.
          :param x: position of the sheep in X
          :param y: position of the sheep in Y
+         :param rng: random.Random instance (or the random module) used to move
          """
         self.x = x
         self.y = y
         self.jump_value = jump_value
         self.name = name
+        self.rng = rng
 
     def move(self):
         # dead sheep cannot move
         if self.x is not None:
-            direction = random.choice(["up", "down", "left", "right"])
-            logger.debug("%s chooses direction: %s", self.name, direction)
+            direction = self.rng.choice(["up", "down", "left", "right"])
+            if debug_logging:
+                logger.debug("%s chooses direction: %s", self.name, direction)
             match direction:
                 case "up":
                     self.y += self.jump_value
@@ -46,7 +85,9 @@ class Animal:
                     self.x -= self.jump_value
                 case "right":
                     self.x += self.jump_value
-            logger.debug("%s moves to (%f,%f)", self.name, self.x, self.y)
+            if debug_logging:
+                logger.debug("%s moves to (%f,%f)", self.name, self.x,
+                             self.y)
 
     def get_position_string(self):
         return f"{self.name} is at ({self.x:.3f},{self.y:.3f})"
@@ -60,29 +101,275 @@ class Animal:
 
 
 class Sheep(Animal):
-    # dead sheep are counted too
-    counter_of_sheep = 0
-    # only alive sheep counter
-    alive_sheep = 0
+    def __init__(self, max_init_posiotion: float, jump_value: float,
+                 simulation):
+        """
+         :param simulation: Simulation keeping the sheep counters and the rng
+         """
+        rng = simulation.rng
+        x, y = (rng.uniform(-max_init_posiotion, max_init_posiotion),
+                rng.uniform(-max_init_posiotion, max_init_posiotion))
+
+        simulation.counter_of_sheep += 1
+        self.number_of_sheep = simulation.counter_of_sheep
+        simulation.alive_sheep += 1
+
+        super().__init__(x, y, jump_value, f"Sheep {self.number_of_sheep}",
+                         rng)
+        # SheepGrid the sheep is registered in, if any
+        self.grid = None
+        if debug_logging:
+            logger.debug("%s initialized at: (%f,%f)",
+                         self.name, self.x, self.y)
+
+    @classmethod
+    def restore(cls, number_of_sheep, x, y, jump_value: float, rng):
+        """Recreate a sheep from a checkpoint without drawing random numbers."""
+        sheep = cls.__new__(cls)
+        sheep.number_of_sheep = number_of_sheep
+        Animal.__init__(sheep, x, y, jump_value, f"Sheep {number_of_sheep}",
+                        rng)
+        sheep.grid = None
+        return sheep
+
+    def move(self):
+        super().move()
+        if self.grid is not None and self.x is not None:
+            self.grid.move(self)
+
+
+class SheepGrid:
+    """Uniform grid of living sheep for the wolf's nearest-sheep search.
+
+    Sheep update their cell when they move and are removed when eaten.
+    nearest() searches rings of cells around the query point and stops once
+    no unvisited cell can hold a closer sheep. Ties are resolved by the lower
+    sheep number, which is the sheep min() over the list would pick.
+    """
+    # margin for the ring bound, absorbs floating point rounding
+    TOLERANCE = 1e-9
+
+    def __init__(self, list_of_sheep, cell_size: float):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.cell_of_sheep = {}
+        for sheep in list_of_sheep:
+            if sheep.x is not None:
+                self.add(sheep)
+
+    def cell(self, x, y):
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def add(self, sheep):
+        key = self.cell(sheep.x, sheep.y)
+        self.cells.setdefault(key, set()).add(sheep)
+        self.cell_of_sheep[sheep] = key
+        sheep.grid = self
+
+    def remove(self, sheep):
+        key = self.cell_of_sheep.pop(sheep)
+        cell = self.cells[key]
+        cell.discard(sheep)
+        if not cell:
+            del self.cells[key]
+        sheep.grid = None
+
+    def move(self, sheep):
+        key = self.cell(sheep.x, sheep.y)
+        old_key = self.cell_of_sheep[sheep]
+        if key != old_key:
+            cell = self.cells[old_key]
+            cell.discard(sheep)
+            if not cell:
+                del self.cells[old_key]
+            self.cells.setdefault(key, set()).add(sheep)
+            self.cell_of_sheep[sheep] = key
+
+    def nearest(self, x, y):
+        if not self.cell_of_sheep:
+            return None
+        cx, cy = self.cell(x, y)
+        best = None
+        best_key = None
+        visited = 0
+        ring = 0
+        while True:
+            for key in self.ring_cells(cx, cy, ring):
+                for sheep in self.cells.get(key, ()):
+                    visited += 1
+                    sort_key = ((x - sheep.x) ** 2 + (y - sheep.y) ** 2,
+                                sheep.number_of_sheep)
+                    if best_key is None or sort_key < best_key:
+                        best, best_key = sheep, sort_key
+            if visited == len(self.cell_of_sheep):
+                return best
+            if best_key is not None:
+                # distance from the query point to the nearest unvisited cell
+                bound = min(x - (cx - ring) * self.cell_size,
+                            (cx + ring + 1) * self.cell_size - x,
+                            y - (cy - ring) * self.cell_size,
+                            (cy + ring + 1) * self.cell_size - y)
+                bound -= self.TOLERANCE * (1 + bound)
+                if bound > 0 and best_key[0] < bound ** 2:
+                    return best
+            ring += 1
+
+    def ring_cells(self, cx, cy, ring):
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+
+class HerdSheep:
+    """Sheep-like view of one sheep stored in a Herd."""
+    __slots__ = ("herd", "index")
+
+    def __init__(self, herd, index):
+        self.herd = herd
+        self.index = index
+
+    @property
+    def x(self):
+        if self.herd.alive[self.index]:
+            return float(self.herd.x[self.index])
+        return None
+
+    @x.setter
+    def x(self, value):
+        if value is None:
+            self.herd.alive[self.index] = False
+        else:
+            self.herd.x[self.index] = value
+
+    @property
+    def y(self):
+        if self.herd.alive[self.index]:
+            return float(self.herd.y[self.index])
+        return None
+
+    @y.setter
+    def y(self, value):
+        if value is None:
+            self.herd.alive[self.index] = False
+        else:
+            self.herd.y[self.index] = value
 
-    def __init__(self, max_init_posiotion: float, jump_value: float):
-        x, y = (random.uniform(-max_init_posiotion, max_init_posiotion),
-                random.uniform(-max_init_posiotion, max_init_posiotion))
+    @property
+    def number_of_sheep(self):
+        return self.herd.first_number + self.index
 
-        Sheep.counter_of_sheep += 1
-        self.number_of_sheep = Sheep.counter_of_sheep
-        Sheep.alive_sheep += 1
+    @property
+    def name(self):
+        return f"Sheep {self.number_of_sheep}"
 
-        super().__init__(x, y, jump_value, f"Sheep {self.number_of_sheep}")
-        logger.debug("%s initialized at: (%f,%f)",
-                     self.name, self.x, self.y)
+    def move(self):
+        raise TypeError("Sheep of a herd are moved together by Herd.move()")
+
+    def get_position_string(self):
+        return f"{self.name} is at ({self.x:.3f},{self.y:.3f})"
+
+    def get_position_tuple(self):
+        if self.herd.alive[self.index]:
+            return float(self.herd.x[self.index]), float(self.herd.y[self.index])
+        return None
+
+
+class Herd:
+    """Struct-of-arrays herd: all positions live in NumPy arrays.
+
+    Dead sheep are marked in the `alive` mask instead of setting their
+    position to None. Iterating over a herd yields HerdSheep views, so code
+    written for a list of Sheep keeps working.
+    """
+
+    def __init__(self, number_of_sheep, max_init_position: float,
+                 jump_value: float, simulation):
+        if np is None:
+            raise ImportError("Array herd requires numpy to be installed")
+        # seeded from the simulation rng, so the herd is reproducible too
+        self.rng = np.random.default_rng(simulation.rng.getrandbits(64))
+        self.x = self.rng.uniform(-max_init_position, max_init_position,
+                                  number_of_sheep)
+        self.y = self.rng.uniform(-max_init_position, max_init_position,
+                                  number_of_sheep)
+        self.alive = np.ones(number_of_sheep, dtype=bool)
+        self.jump_value = jump_value
+        self.first_number = simulation.counter_of_sheep + 1
+        simulation.counter_of_sheep += number_of_sheep
+        simulation.alive_sheep += number_of_sheep
+        # direction codes 0-3 are up, down, left, right
+        self.step_x = np.array([0.0, 0.0, -jump_value, jump_value])
+        self.step_y = np.array([jump_value, -jump_value, 0.0, 0.0])
+        if debug_logging:
+            for sheep in self:
+                logger.debug("%s initialized at: (%f,%f)",
+                             sheep.name, sheep.x, sheep.y)
+
+    @classmethod
+    def restore(cls, x, y, alive, jump_value: float, rng_state):
+        """Recreate a herd of a new simulation from checkpoint arrays."""
+        herd = cls.__new__(cls)
+        herd.rng = np.random.default_rng()
+        herd.rng.bit_generator.state = rng_state
+        herd.x = x
+        herd.y = y
+        herd.alive = alive
+        herd.jump_value = jump_value
+        herd.first_number = 1
+        herd.step_x = np.array([0.0, 0.0, -jump_value, jump_value])
+        herd.step_y = np.array([jump_value, -jump_value, 0.0, 0.0])
+        return herd
+
+    def __len__(self):
+        return len(self.alive)
+
+    def __getitem__(self, index):
+        return HerdSheep(self, index)
+
+    def __iter__(self):
+        return (HerdSheep(self, i) for i in range(len(self.alive)))
+
+    def move(self):
+        """Move every living sheep with one batched random draw."""
+        living = np.flatnonzero(self.alive)
+        directions = self.rng.integers(0, 4, size=living.size)
+        self.x[living] += self.step_x[directions]
+        self.y[living] += self.step_y[directions]
+        if debug_logging:
+            names = ("up", "down", "left", "right")
+            for i, direction in zip(living.tolist(), directions.tolist()):
+                logger.debug("Sheep %d chooses direction: %s",
+                             self.first_number + i, names[direction])
+                logger.debug("Sheep %d moves to (%f,%f)",
+                             self.first_number + i, self.x[i], self.y[i])
+
+    def nearest(self, x, y):
+        """Closest living sheep, ties resolved like min() over the list."""
+        square_distances = (x - self.x) ** 2 + (y - self.y) ** 2
+        square_distances[~self.alive] = np.inf
+        return self[int(np.argmin(square_distances))]
+
+    def get_position_tuples(self):
+        x = self.x.tolist()
+        y = self.y.tolist()
+        return [(x[i], y[i]) if alive else None
+                for i, alive in enumerate(self.alive.tolist())]
 
 
 class Wolf(Animal):
-    def __init__(self, jump_value: float, list_of_sheep, name="Wolf"):
+    def __init__(self, jump_value: float, list_of_sheep, simulation,
+                 name="Wolf", grid=None):
         x, y = 0, 0
-        super().__init__(x, y, jump_value, name)
+        super().__init__(x, y, jump_value, name, simulation.rng)
         self.list_of_sheep = list_of_sheep
+        self.simulation = simulation
+        self.grid = grid
         self.last_chasing_sheep = None
 
     def calc_square_distance_to_sheep(self, sheep: Sheep):
@@ -93,14 +380,22 @@ class Wolf(Animal):
             return float('inf')
 
     def kill_sheep(self, sheep: Sheep):
+        if self.grid is not None:
+            self.grid.remove(sheep)
         sheep.x = None
         sheep.y = None
-        Sheep.alive_sheep -= 1
+        self.simulation.alive_sheep -= 1
+
+    def find_closest_sheep(self):
+        if isinstance(self.list_of_sheep, Herd):
+            return self.list_of_sheep.nearest(self.x, self.y)
+        if self.grid is not None:
+            return self.grid.nearest(self.x, self.y)
+        return min(self.list_of_sheep,
+                   key=lambda sheep: self.calc_square_distance_to_sheep(sheep))
 
     def move(self):
-        closest = min(self.list_of_sheep,
-                      key=lambda sheep: self.calc_square_distance_to_sheep(
-                          sheep))
+        closest = self.find_closest_sheep()
         dist = math.sqrt(self.calc_square_distance_to_sheep(closest))
         logger.debug("%s is closest to %s, distance %f", self.name,
                      closest.name, dist)
@@ -128,64 +423,690 @@ class Wolf(Animal):
         return self.last_chasing_sheep.number_of_sheep
 
 
-def delete_and_init_files():
-    try:
-        with open(JSON_FILE_NAME, "w") as json_file:
-            json.dump([], json_file)
-            logger.debug("Empty collection saved to json")
-
-        with open(CSV_FILE_NAME, "w", newline='') as csv_file:
-            csv.writer(csv_file).writerow(
-                ["Number of round", "Alive sheep"])
-            logger.debug("Header saved to csv")
-
-    except IOError:
-        logger.error("An error occurred when preparing files")
+class RoundProfiler:
+    """Wall time and call count of every phase of every round.
+
+    Each round is appended to a CSV trace as soon as it ends, totals are
+    kept for the summary table. Callers only time phases when a profiler is
+    set, so there is no cost when profiling is off.
+    """
+    PHASES = ("sheep", "wolf", "json", "csv", "print", "log")
+
+    def __init__(self, trace_path=PROFILE_FILE_NAME):
+        self.total_time = dict.fromkeys(self.PHASES, 0.0)
+        self.total_calls = dict.fromkeys(self.PHASES, 0)
+        self.round_time = dict.fromkeys(self.PHASES, 0.0)
+        self.rounds = 0
+        self.trace_file = open(trace_path, "w", newline='')
+        self.trace_writer = csv.writer(self.trace_file)
+        self.trace_writer.writerow(["Number of round"] + list(self.PHASES))
+
+    def add(self, phase, seconds):
+        self.round_time[phase] += seconds
+        self.total_calls[phase] += 1
+
+    def end_round(self, round_counter):
+        self.rounds += 1
+        self.trace_writer.writerow(
+            [round_counter] + [f"{self.round_time[phase]:.9f}"
+                               for phase in self.PHASES])
+        for phase in self.PHASES:
+            self.total_time[phase] += self.round_time[phase]
+            self.round_time[phase] = 0.0
+
+    def summary(self):
+        total = sum(self.total_time.values()) or 1.0
+        lines = [f"{'Phase':<8}{'Calls':>10}{'Total [s]':>14}"
+                 f"{'Per round [ms]':>16}{'Share':>8}"]
+        for phase in self.PHASES:
+            per_round = self.total_time[phase] / max(self.rounds, 1) * 1000
+            lines.append(f"{phase:<8}{self.total_calls[phase]:>10}"
+                         f"{self.total_time[phase]:>14.6f}"
+                         f"{per_round:>16.4f}"
+                         f"{self.total_time[phase] / total:>8.1%}")
+        return "\n".join(lines)
+
+    def close(self, summary_path=PROFILE_SUMMARY_FILE_NAME):
+        self.trace_file.close()
+        try:
+            with open(summary_path, "w") as summary_file:
+                summary_file.write(self.summary() + "\n")
+        except IOError:
+            logger.error("Error occurred with writing profile summary")
+
+
+class Simulation:
+    """State of one chase, independent of any other simulation.
+
+    Parameters default to the module settings (command line and config).
+    With `seed` the simulation gets its own random.Random, otherwise it uses
+    the global `random` module.
+    """
+
+    def __init__(self, number_of_sheep=None, max_rounds=None,
+                 max_init_position=None, sheep_move=None, wolf_move=None,
+                 seed=None, array_herd=False, use_grid=True, profiler=None):
+        self.number_of_sheep = (NUMBER_OF_SHEEP if number_of_sheep is None
+                                else number_of_sheep)
+        self.max_rounds = MAX_ROUNDS if max_rounds is None else max_rounds
+        max_init_position = (MAX_INIT_POSITION if max_init_position is None
+                             else max_init_position)
+        self.max_init_position = max_init_position
+        sheep_move = (DISTANCE_OF_SHEEP_MOVEMENT if sheep_move is None
+                      else sheep_move)
+        wolf_move = DISTANCE_OF_WOLF_MOVEMENT if wolf_move is None else wolf_move
+        self.sheep_move = sheep_move
+        self.wolf_move = wolf_move
+        self.rng = random if seed is None else random.Random(seed)
+        # dead sheep are counted too
+        self.counter_of_sheep = 0
+        # only alive sheep counter
+        self.alive_sheep = 0
+        self.round_counter = 0
+        self.eaten_sheep = None
+        self.profiler = profiler
+
+        if array_herd:
+            self.sheep = Herd(self.number_of_sheep, max_init_position,
+                              sheep_move, self)
+        else:
+            self.sheep = [Sheep(max_init_position, sheep_move, self)
+                          for _ in range(self.number_of_sheep)]
+        logger.info("Position of all sheep were determined")
+        grid = None
+        if not array_herd and use_grid:
+            # about one sheep per cell at the start
+            grid = SheepGrid(self.sheep, max(sheep_move,
+                                             2 * max_init_position
+                                             / math.sqrt(self.number_of_sheep)))
+        self.wolf = Wolf(wolf_move, self.sheep, self, grid=grid)
+
+    def step(self):
+        """Play one round, returns False when the simulation has ended."""
+        if self.round_counter >= self.max_rounds:
+            logger.info("Simulation terminated as max "
+                        "number of rounds have been reached")
+            return False
+        if self.alive_sheep <= 0:
+            logger.info("Simulation terminated as all sheep have been eaten")
+            return False
+        self.round_counter += 1
+        logger.info("Round %d started", self.round_counter)
+        profiler = self.profiler
+        if profiler is not None:
+            start = time.perf_counter()
+        if isinstance(self.sheep, Herd):
+            self.sheep.move()
+        else:
+            for _sheep in self.sheep:
+                _sheep.move()
+        if profiler is not None:
+            profiler.add("sheep", time.perf_counter() - start)
+        logger.info("All alive sheep moved")
 
+        if profiler is not None:
+            start = time.perf_counter()
+        self.eaten_sheep = self.wolf.move()
+        if profiler is not None:
+            profiler.add("wolf", time.perf_counter() - start)
 
-def add_to_json(round_counter, wolf, sheep):
+        logger.info("Wolf has moved")
+        return True
+
+
+class SurvivalStatistics:
+    """Alive sheep per round aggregated over many simulations.
+
+    Every run is folded in as soon as it finishes, only a histogram of alive
+    counts per round is kept, never the history of a run. A run which ended
+    because all sheep were eaten counts as 0 alive sheep in later rounds.
+    """
+
+    def __init__(self, max_rounds):
+        self.runs = 0
+        self.alive_histograms = [Counter() for _ in range(max_rounds)]
+        self.extinction_rounds = Counter()
+
+    def add_run(self, alive_per_round):
+        self.runs += 1
+        for round_no, histogram in enumerate(self.alive_histograms):
+            if round_no < len(alive_per_round):
+                histogram[alive_per_round[round_no]] += 1
+            else:
+                histogram[0] += 1
+        if alive_per_round and alive_per_round[-1] == 0:
+            self.extinction_rounds[len(alive_per_round)] += 1
+
+    def merge(self, other):
+        self.runs += other.runs
+        for histogram, other_histogram in zip(self.alive_histograms,
+                                              other.alive_histograms):
+            histogram.update(other_histogram)
+        self.extinction_rounds.update(other.extinction_rounds)
+
+    @staticmethod
+    def mean_of(histogram):
+        total = sum(histogram.values())
+        return sum(value * count for value, count in histogram.items()) / total
+
+    @staticmethod
+    def quantile_of(histogram, q):
+        """Nearest-rank quantile of the values counted in `histogram`."""
+        rank = max(1, math.ceil(q * sum(histogram.values())))
+        seen = 0
+        for value in sorted(histogram):
+            seen += histogram[value]
+            if seen >= rank:
+                return value
+
+    def extinct_runs(self):
+        return sum(self.extinction_rounds.values())
+
+
+def run_batch_task(task):
+    seed, parameters = task
+    simulation = Simulation(seed=seed, **parameters)
+    alive_per_round = []
+    while simulation.step():
+        alive_per_round.append(simulation.alive_sheep)
+    return alive_per_round
+
+
+def run_batch(runs, master_seed=None, processes=None, **parameters):
+    """Run `runs` independent simulations on a process pool.
+
+    The seed of every run is drawn from `master_seed` up front and results
+    are folded in run order, so the statistics do not depend on the number
+    of processes. `parameters` are passed to Simulation; the ones left out
+    are taken from the module settings here, because workers started with
+    the spawn method (Windows) do not see the settings of this process.
+    """
+    parameters = dict(parameters)
+    for name, value in (("number_of_sheep", NUMBER_OF_SHEEP),
+                        ("max_rounds", MAX_ROUNDS),
+                        ("max_init_position", MAX_INIT_POSITION),
+                        ("sheep_move", DISTANCE_OF_SHEEP_MOVEMENT),
+                        ("wolf_move", DISTANCE_OF_WOLF_MOVEMENT)):
+        if parameters.get(name) is None:
+            parameters[name] = value
+    master = random.Random(master_seed)
+    tasks = [(master.getrandbits(64), parameters) for _ in range(runs)]
+    statistics = SurvivalStatistics(parameters["max_rounds"])
+    if processes == 1:
+        for alive_per_round in map(run_batch_task, tasks):
+            statistics.add_run(alive_per_round)
+        return statistics
+    with multiprocessing.Pool(processes) as pool:
+        for alive_per_round in pool.imap(run_batch_task, tasks,
+                                         chunksize=max(1, runs // 64)):
+            statistics.add_run(alive_per_round)
+    return statistics
+
+
+def save_survival_csv(statistics, file_name=SURVIVAL_FILE_NAME):
     try:
-        with open(JSON_FILE_NAME, "r") as json_file:
-            json_data = json.load(json_file)
+        with open(file_name, "w", newline='') as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(["Number of round", "Mean alive sheep",
+                                 "Q10", "Median", "Q90"])
+            for round_no, histogram in enumerate(
+                    statistics.alive_histograms, start=1):
+                csv_writer.writerow([
+                    round_no,
+                    f"{statistics.mean_of(histogram):.4f}",
+                    statistics.quantile_of(histogram, 0.1),
+                    statistics.quantile_of(histogram, 0.5),
+                    statistics.quantile_of(histogram, 0.9),
+                ])
     except IOError:
-        logger.error("Error occurred with reading json")
+        logger.error("Error occurred with writing survival statistics")
+
+
+def print_survival_summary(statistics):
+    extinct = statistics.extinct_runs()
+    print(f"Runs: {statistics.runs}")
+    print(f"Runs with all sheep eaten: {extinct}")
+    if extinct:
+        print(f"Mean time to extinction: "
+              f"{statistics.mean_of(statistics.extinction_rounds):.2f} rounds")
+        print(f"Median time to extinction: "
+              f"{statistics.quantile_of(statistics.extinction_rounds, 0.5)}"
+              f" rounds")
+    last_round = statistics.alive_histograms[-1]
+    print(f"Mean alive sheep after round {len(statistics.alive_histograms)}: "
+          f"{statistics.mean_of(last_round):.2f}")
+
+
+def pack_bits(flags):
+    """Pack a list of booleans into a little-endian bitmap."""
+    bitmap = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap)
+
+
+def unpack_bits(bitmap, count):
+    return [bool(bitmap[i >> 3] >> (i & 7) & 1) for i in range(count)]
+
+
+def save_checkpoint(simulation, output_sizes, path=CHECKPOINT_FILE_NAME):
+    """Write the whole simulation state to a compact binary file.
+
+    Layout: magic, CHECKPOINT_HEADER, the `random` state (version, 625
+    words, gauss_next), the NumPy generator state of an array herd as JSON,
+    x and y of all sheep as float64 arrays and the alive bitmap. The file is
+    written next to `path` and renamed, so a crash never leaves a broken
+    checkpoint behind.
+    """
+    wolf = simulation.wolf
+    herd = simulation.sheep
+    array_herd = isinstance(herd, Herd)
+    chased = wolf.last_chasing_sheep
+    version, words, gauss_next = simulation.rng.getstate()
+    if array_herd:
+        x_bytes = herd.x.astype("<f8").tobytes()
+        y_bytes = herd.y.astype("<f8").tobytes()
+        bitmap = np.packbits(herd.alive, bitorder="little").tobytes()
+        herd_state = json.dumps(herd.rng.bit_generator.state).encode()
+    else:
+        alive = [_sheep.x is not None for _sheep in herd]
+        x_bytes = array.array("d", (_sheep.x if _sheep.x is not None else 0.0
+                                    for _sheep in herd)).tobytes()
+        y_bytes = array.array("d", (_sheep.y if _sheep.y is not None else 0.0
+                                    for _sheep in herd)).tobytes()
+        bitmap = pack_bits(alive)
+        herd_state = b""
     try:
-        with open(JSON_FILE_NAME, "w") as json_file:
-            dict_round = {
-                "round_no": round_counter,
-                "wolf_pos": wolf.get_position_tuple(),
-                "sheep_pos": [_sheep.get_position_tuple() for _sheep in sheep],
-            }
-            json_data.append(dict_round)
-            json.dump(json_data, json_file, ensure_ascii=False, indent=4)
-            logger.debug("Data saved into json")
+        with open(path + ".tmp", "wb") as checkpoint_file:
+            checkpoint_file.write(CHECKPOINT_MAGIC)
+            checkpoint_file.write(CHECKPOINT_HEADER.pack(
+                simulation.round_counter, simulation.max_rounds,
+                simulation.number_of_sheep, simulation.counter_of_sheep,
+                simulation.alive_sheep, array_herd,
+                simulation.max_init_position, simulation.sheep_move,
+                simulation.wolf_move,
+                wolf.x, wolf.y, chased.number_of_sheep if chased else 0,
+                *output_sizes))
+            checkpoint_file.write(struct.pack(
+                "<I625I?d", version, *words, gauss_next is not None,
+                gauss_next or 0.0))
+            checkpoint_file.write(struct.pack("<I", len(herd_state)))
+            checkpoint_file.write(herd_state)
+            checkpoint_file.write(x_bytes)
+            checkpoint_file.write(y_bytes)
+            checkpoint_file.write(bitmap)
+        os.replace(path + ".tmp", path)
+        logger.info("Checkpoint saved after round %d",
+                    simulation.round_counter)
     except IOError:
-        logger.error("Error occurred with writing to json")
+        logger.error("Error occurred with saving checkpoint")
+
+
+def read_exact(checkpoint_file, size):
+    data = checkpoint_file.read(size)
+    if len(data) != size:
+        raise ValueError(f"'{checkpoint_file.name}' is truncated")
+    return data
+
+
+def load_checkpoint(path=CHECKPOINT_FILE_NAME, max_rounds=None,
+                    max_init_position=None, use_grid=True, profiler=None):
+    """Rebuild a Simulation saved by save_checkpoint().
+
+    `max_rounds` and `max_init_position` default to the values stored in
+    the checkpoint. Returns the simulation and the output file sizes for
+    SimulationOutput. A file which is not a complete checkpoint raises
+    ValueError.
+    """
+    with open(path, "rb") as checkpoint_file:
+        if checkpoint_file.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+            raise ValueError(f"'{path}' is not a chase checkpoint")
+        (round_counter, saved_max_rounds, number_of_sheep, counter_of_sheep,
+         alive_sheep, array_herd, saved_max_init_position, sheep_move,
+         wolf_move, wolf_x, wolf_y, chased,
+         *output_sizes) = CHECKPOINT_HEADER.unpack(
+            read_exact(checkpoint_file, CHECKPOINT_HEADER.size))
+        rng_state = struct.unpack("<I625I?d",
+                                  read_exact(checkpoint_file,
+                                             struct.calcsize("<I625I?d")))
+        herd_state_size, = struct.unpack("<I", read_exact(checkpoint_file, 4))
+        herd_state = read_exact(checkpoint_file, herd_state_size)
+        x_bytes = read_exact(checkpoint_file, 8 * number_of_sheep)
+        y_bytes = read_exact(checkpoint_file, 8 * number_of_sheep)
+        bitmap = read_exact(checkpoint_file, (number_of_sheep + 7) // 8)
+        if not (0 < number_of_sheep and chased <= number_of_sheep
+                and alive_sheep <= number_of_sheep):
+            raise ValueError(f"'{path}' is corrupted")
+
+    simulation = Simulation.__new__(Simulation)
+    simulation.number_of_sheep = number_of_sheep
+    simulation.max_rounds = (saved_max_rounds if max_rounds is None
+                             else max_rounds)
+    simulation.max_init_position = (saved_max_init_position
+                                    if max_init_position is None
+                                    else max_init_position)
+    simulation.sheep_move = sheep_move
+    simulation.wolf_move = wolf_move
+    simulation.rng = random.Random()
+    simulation.rng.setstate((rng_state[0], rng_state[1:626],
+                             rng_state[627] if rng_state[626] else None))
+    simulation.counter_of_sheep = counter_of_sheep
+    simulation.alive_sheep = alive_sheep
+    simulation.round_counter = round_counter
+    simulation.eaten_sheep = None
+    simulation.profiler = profiler
+
+    grid = None
+    if array_herd:
+        if np is None:
+            raise ImportError("Array herd requires numpy to be installed")
+        alive = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8),
+                              count=number_of_sheep,
+                              bitorder="little").astype(bool)
+        simulation.sheep = Herd.restore(
+            np.frombuffer(x_bytes, dtype="<f8").astype(float),
+            np.frombuffer(y_bytes, dtype="<f8").astype(float),
+            alive, sheep_move, json.loads(herd_state))
+    else:
+        xs = array.array("d")
+        xs.frombytes(x_bytes)
+        ys = array.array("d")
+        ys.frombytes(y_bytes)
+        alive = unpack_bits(bitmap, number_of_sheep)
+        simulation.sheep = [
+            Sheep.restore(i + 1, xs[i] if alive[i] else None,
+                          ys[i] if alive[i] else None, sheep_move,
+                          simulation.rng)
+            for i in range(number_of_sheep)]
+        if use_grid:
+            grid = SheepGrid(simulation.sheep,
+                             max(sheep_move,
+                                 2 * simulation.max_init_position
+                                 / math.sqrt(number_of_sheep)))
+    wolf = Wolf(wolf_move, simulation.sheep, simulation, grid=grid)
+    wolf.x = wolf_x
+    wolf.y = wolf_y
+    if chased:
+        wolf.last_chasing_sheep = simulation.sheep[chased - 1]
+    simulation.wolf = wolf
+    logger.info("Simulation resumed after round %d", round_counter)
+    return simulation, output_sizes
+
+
+def get_position_tuples(sheep):
+    if isinstance(sheep, Herd):
+        return sheep.get_position_tuples()
+    return [_sheep.get_position_tuple() for _sheep in sheep]
+
+
+def open_truncated(path, mode, size):
+    _file = open(path, mode, newline='') if "b" not in mode else open(path,
+                                                                       mode)
+    _file.truncate(size)
+    _file.seek(size)
+    return _file
+
+
+class SimulationOutput:
+    """Per-round output files, kept open for the whole simulation.
+
+    Positions are appended to an NDJSON file (one round per line) with a
+    single buffered write per round. The byte offset of every round goes to
+    a side index file, so PositionReader can seek to any round.
+    """
+
+    def __init__(self, positions_path=POSITIONS_FILE_NAME,
+                 csv_path=CSV_FILE_NAME, resume_sizes=None):
+        """
+         :param resume_sizes: file sizes returned by flush() when a checkpoint
+          was saved; the files are cut to them and appended to
+         """
+        self.positions_file = None
+        self.index_file = None
+        self.csv_file = None
+        self.csv_writer = None
+        self.offset = 0
+        try:
+            if resume_sizes is not None:
+                self.offset, index_size, csv_size = resume_sizes
+                self.positions_file = open_truncated(positions_path, "r+b",
+                                                     self.offset)
+                self.index_file = open_truncated(positions_path + INDEX_SUFFIX,
+                                                 "r+b", index_size)
+                self.csv_file = open_truncated(csv_path, "r+", csv_size)
+                self.csv_writer = csv.writer(self.csv_file)
+                logger.debug("Output files truncated to the checkpoint")
+                return
+            self.positions_file = open(positions_path, "wb")
+            self.index_file = open(positions_path + INDEX_SUFFIX, "wb")
+            logger.debug("Position log created")
+
+            self.csv_file = open(csv_path, "w", newline='')
+            self.csv_writer = csv.writer(self.csv_file)
+            self.csv_writer.writerow(["Number of round", "Alive sheep"])
+            logger.debug("Header saved to csv")
+        except IOError:
+            logger.error("An error occurred when preparing files")
+
+    def flush(self):
+        """Flush all files, return their sizes for a checkpoint."""
+        for _file in (self.positions_file, self.index_file, self.csv_file):
+            if _file is not None:
+                _file.flush()
+        if self.positions_file is None or self.csv_file is None:
+            return 0, 0, 0
+        return self.offset, self.index_file.tell(), self.csv_file.tell()
+
+    def add_to_json(self, round_counter, wolf_pos, sheep_pos):
+        if self.positions_file is None:
+            return
+        dict_round = {
+            "round_no": round_counter,
+            "wolf_pos": wolf_pos,
+            "sheep_pos": sheep_pos,
+        }
+        line = (json.dumps(dict_round, ensure_ascii=False,
+                           separators=(",", ":")) + "\n").encode()
+        try:
+            self.index_file.write(struct.pack(INDEX_FORMAT, round_counter,
+                                              self.offset))
+            self.positions_file.write(line)
+            self.offset += len(line)
+            logger.debug("Data saved into json")
+        except IOError:
+            logger.error("Error occurred with writing to json")
+
+    def add_to_csv(self, round_counter, alive_sheep):
+        if self.csv_writer is None:
+            return
+        try:
+            self.csv_writer.writerow([f"{round_counter}", f"{alive_sheep}"])
+            logger.debug("Data saved into csv")
+        except IOError:
+            logger.error("Error occurred with appending to csv")
+
+    def close(self):
+        for _file in (self.positions_file, self.index_file, self.csv_file):
+            if _file is not None:
+                _file.close()
+
+
+class BackgroundOutput:
+    """Runs SimulationOutput in a writer thread.
+
+    The simulation only puts immutable round snapshots on a bounded queue.
+    When the queue is full the "block" policy waits for the writer, the
+    "drop" policy skips the position record of that round (alive counts are
+    always written) and counts it in `dropped_rounds`. close() writes
+    everything still queued before returning. An exception of the writer is
+    kept, the rest of the queue is discarded and flush() or close() raise it.
+    """
+
+    def __init__(self, output, policy="block",
+                 queue_size=OUTPUT_QUEUE_SIZE):
+        self.output = output
+        self.policy = policy
+        self.dropped_rounds = 0
+        self.error = None
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(target=self.write_loop,
+                                       name="output-writer", daemon=True)
+        self.thread.start()
+
+    def write_loop(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    break
+                if self.error is None:
+                    method, args = item
+                    getattr(self.output, method)(*args)
+            except Exception as error:
+                # keep draining, a blocked put() or flush() must not hang
+                self.error = error
+            finally:
+                self.queue.task_done()
+
+    def raise_error(self):
+        if self.error is not None:
+            raise RuntimeError("Background output writer failed") \
+                from self.error
+
+    def add_to_json(self, round_counter, wolf_pos, sheep_pos):
+        # sheep_pos is a fresh list the simulation never touches again
+        snapshot = ("add_to_json", (round_counter, wolf_pos, sheep_pos))
+        if self.policy == "drop":
+            try:
+                self.queue.put_nowait(snapshot)
+            except queue.Full:
+                self.dropped_rounds += 1
+        else:
+            self.queue.put(snapshot)
 
+    def add_to_csv(self, round_counter, alive_sheep):
+        self.queue.put(("add_to_csv", (round_counter, alive_sheep)))
 
-def add_to_csv(round_counter, alive_sheep):
+    def flush(self):
+        """Wait until everything queued is written, see SimulationOutput."""
+        self.queue.join()
+        self.raise_error()
+        return self.output.flush()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.output.close()
+        if self.dropped_rounds:
+            logger.warning("%d rounds were not saved to json, output queue "
+                           "was full", self.dropped_rounds)
+        self.raise_error()
+
+
+class PositionReader:
+    """Random access to the rounds of a position log written by
+    SimulationOutput, without loading the whole file."""
+
+    def __init__(self, positions_path=POSITIONS_FILE_NAME):
+        self.positions_file = open(positions_path, "rb")
+        self.index_file = open(positions_path + INDEX_SUFFIX, "rb")
+
+    def __len__(self):
+        self.index_file.seek(0, os.SEEK_END)
+        return self.index_file.tell() // INDEX_RECORD_SIZE
+
+    def index_record(self, position):
+        self.index_file.seek(position * INDEX_RECORD_SIZE)
+        return struct.unpack(INDEX_FORMAT,
+                             self.index_file.read(INDEX_RECORD_SIZE))
+
+    def read_round(self, round_no):
+        """Return the record of round `round_no` (counted from 1).
+
+        Without dropped rounds it is the record at position round_no - 1,
+        otherwise the increasing round numbers of the index are bisected.
+        """
+        low, high = 0, min(round_no, len(self))
+        if high > 0 and self.index_record(high - 1)[0] == round_no:
+            low = high - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.index_record(middle)[0] < round_no:
+                low = middle + 1
+            else:
+                high = middle
+        if low >= len(self) or self.index_record(low)[0] != round_no:
+            raise IndexError(f"Round {round_no} is not in the log")
+        _, offset = self.index_record(low)
+        self.positions_file.seek(offset)
+        return json.loads(self.positions_file.readline())
+
+    def __iter__(self):
+        self.positions_file.seek(0)
+        for line in self.positions_file:
+            yield json.loads(line)
+
+    def close(self):
+        self.positions_file.close()
+        self.index_file.close()
+
+
+def export_json(positions_path=POSITIONS_FILE_NAME,
+                json_path=JSON_FILE_NAME):
+    """Write the position log in the pos.json layout, one round at a time."""
     try:
-        with open(CSV_FILE_NAME, "a", newline='') as csvfile:
-            csvwriter = csv.writer(csvfile)
-            csvwriter.writerow([f"{round_counter}", f"{alive_sheep}"])
-            logger.debug("Data saved into csv")
+        reader = PositionReader(positions_path)
+        with open(json_path, "w") as json_file:
+            json_file.write("[")
+            separator = "\n"
+            for dict_round in reader:
+                text = json.dumps(dict_round, ensure_ascii=False, indent=4)
+                json_file.write(separator + "    "
+                                + text.replace("\n", "\n    "))
+                separator = ",\n"
+            json_file.write("\n]" if separator == ",\n" else "]")
+        reader.close()
+        logger.debug("Position log exported to json")
     except IOError:
-        logger.error("Error occurred with appending to csv")
+        logger.error("Error occurred with exporting json")
 
 
-def get_logger(logging_level):
+def get_logger(logging_level, background=False):
+    """Configure the root logger writing to chase.log.
+
+    With `background` the records go through a QueueHandler and a
+    QueueListener thread writes the file; stop_logger() flushes it.
+    """
+    global log_listener, debug_logging
     if logging_level is None:
         _logger = logging.getLogger()
         _logger.addHandler(logging.NullHandler())
         return _logger
-    logging.basicConfig(filename="chase.log",
-                        format='%(asctime)s - %(levelname)s - %(message)s',
-                        filemode="w")
-    _logger = logging.getLogger()
+    if background:
+        file_handler = logging.FileHandler("chase.log", mode="w")
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        log_queue = queue.Queue(-1)
+        log_listener = QueueListener(log_queue, file_handler)
+        log_listener.start()
+        _logger = logging.getLogger()
+        _logger.addHandler(QueueHandler(log_queue))
+    else:
+        logging.basicConfig(filename="chase.log", format=LOG_FORMAT,
+                            filemode="w")
+        _logger = logging.getLogger()
     _logger.setLevel(logging_level)
+    debug_logging = _logger.isEnabledFor(logging.DEBUG)
     return _logger
 
 
+def stop_logger():
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
+
 def load_config(config_path):
     if config_path is None:
         return None
@@ -279,6 +1200,18 @@ def positive_int_sheep(val):
     return int_value
 
 
+def positive_int_runs(val):
+    try:
+        int_value = int(val)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "Number of runs should be NUMBER not text")
+    if int_value <= 0:
+        raise argparse.ArgumentTypeError(
+            "Number of runs should be positive integer.")
+    return int_value
+
+
 def argument_parse():
     global NUMBER_OF_SHEEP, MAX_ROUNDS
 
@@ -295,13 +1228,60 @@ def argument_parse():
                         metavar="LEVEL")
 
     parser.add_argument("-r", "--rounds", type=positive_int_rounds,
-                        default=MAX_ROUNDS, help="Number of rounds",
+                        help=f"Number of rounds (default {MAX_ROUNDS}, with "
+                             f"--resume the one in the checkpoint)",
                         metavar="NUM")
 
     parser.add_argument("-s", "--sheep", type=positive_int_sheep,
                         default=NUMBER_OF_SHEEP, help="Number of sheep",
                         metavar="NUM")
 
+    parser.add_argument("-a", "--array-herd", action="store_true",
+                        help="Keep the herd in NumPy arrays and move all "
+                             "sheep at once (requires numpy).")
+
+    parser.add_argument("--no-grid", action="store_true",
+                        help="Find the closest sheep with a linear scan "
+                             "instead of the spatial grid.")
+
+    parser.add_argument("--no-json", action="store_true",
+                        help=f"Keep only the streamed {POSITIONS_FILE_NAME} "
+                             f"log, do not export {JSON_FILE_NAME}.")
+
+    parser.add_argument("-b", "--background-output",
+                        choices=["block", "drop"], metavar="POLICY",
+                        help="Write files and chase.log from background "
+                             "threads. When the output queue is full "
+                             "'block' waits, 'drop' skips json rounds.")
+
+    parser.add_argument("--seed", type=int, help="Seed of the simulation",
+                        metavar="NUM")
+
+    parser.add_argument("--batch", type=positive_int_runs,
+                        help="Run NUM simulations on all CPU cores and save "
+                             f"alive sheep statistics to {SURVIVAL_FILE_NAME}"
+                             " (the seed is the master seed, nothing is "
+                             "logged)", metavar="NUM")
+
+    parser.add_argument("-p", "--processes", type=int,
+                        help="Number of processes for --batch", metavar="NUM")
+
+    parser.add_argument("--profile", action="store_true",
+                        help="Time every phase of every round, write the "
+                             f"trace to {PROFILE_FILE_NAME} and a summary "
+                             f"to {PROFILE_SUMMARY_FILE_NAME}.")
+
+    parser.add_argument("--checkpoint-every", type=positive_int_rounds,
+                        help="Save a checkpoint every NUM rounds",
+                        metavar="NUM")
+
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE_NAME,
+                        help="Checkpoint file", metavar="FILE")
+
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the simulation saved in the "
+                             "checkpoint file.")
+
     parser.add_argument("-w", "--wait", action="store_true",
                         help="Pauses program after each round,"
                              " waiting for any keyboard input.")
@@ -329,54 +1309,106 @@ def argument_parse():
 def main():
     args = argument_parse()
     global logger
-    logger = get_logger(args.log)
+    if args.batch:
+        load_config(args.config)
+        statistics = run_batch(args.batch, args.seed, args.processes,
+                               number_of_sheep=NUMBER_OF_SHEEP,
+                               max_rounds=MAX_ROUNDS,
+                               max_init_position=MAX_INIT_POSITION,
+                               sheep_move=DISTANCE_OF_SHEEP_MOVEMENT,
+                               wolf_move=DISTANCE_OF_WOLF_MOVEMENT,
+                               array_herd=args.array_herd,
+                               use_grid=not args.no_grid)
+        save_survival_csv(statistics)
+        print_survival_summary(statistics)
+        return
+    logger = get_logger(args.log, args.background_output is not None)
     load_config(args.config)
 
-    delete_and_init_files()
-    round_counter = 1
-    sheep = [Sheep(MAX_INIT_POSITION, DISTANCE_OF_SHEEP_MOVEMENT) for _ in
-             range(NUMBER_OF_SHEEP)]
-    logger.info("Position of all sheep were determined")
-    wolf = Wolf(DISTANCE_OF_WOLF_MOVEMENT, sheep)
-
-    while True:
-        if round_counter > MAX_ROUNDS:
-            logger.info("Simulation terminated as max "
-                        "number of rounds have been reached")
-            break
-        if Sheep.alive_sheep > 0:
-            logger.info("Round %d started", round_counter)
-            for _sheep in sheep:
-                _sheep.move()
-        else:
-            logger.info("Simulation terminated as all sheep have been eaten")
-            break
-        logger.info("All alive sheep moved")
-
-        eaten_sheep = wolf.move()
-
-        logger.info("Wolf has moved")
+    profiler = RoundProfiler() if args.profile else None
+    if args.resume:
+        try:
+            # the checkpoint's settings unless given on the command line
+            simulation, output_sizes = load_checkpoint(
+                args.checkpoint, max_rounds=args.rounds,
+                max_init_position=MAX_INIT_POSITION if args.config else None,
+                use_grid=not args.no_grid, profiler=profiler)
+        except (IOError, ValueError, ImportError) as error:
+            stop_logger()
+            raise SystemExit(f"Cannot resume from '{args.checkpoint}': "
+                             f"{error}")
+        if simulation.round_counter >= simulation.max_rounds:
+            stop_logger()
+            print(f"Checkpoint '{args.checkpoint}' is already at round "
+                  f"{simulation.round_counter} of {simulation.max_rounds}, "
+                  f"nothing to resume. Use -r to allow more rounds.")
+            return
+        output = SimulationOutput(resume_sizes=output_sizes)
+    else:
+        output = SimulationOutput()
+        simulation = Simulation(seed=args.seed, array_herd=args.array_herd,
+                                use_grid=not args.no_grid, profiler=profiler)
+    if args.background_output:
+        output = BackgroundOutput(output, args.background_output)
+    wolf = simulation.wolf
 
-        add_to_json(round_counter, wolf, sheep)
-        add_to_csv(round_counter, Sheep.alive_sheep)
-
-        print(f"\nRound number: {round_counter}\n"
-              f"{wolf.get_position_string()}\n"
-              f"Number of alive Sheep: {Sheep.alive_sheep}"
-              )
-        if wolf.last_chasing_sheep:
-            print(
-                f"The wolf is chasing sheep with number:"
-                f" {wolf.get_number_of_chasing_sheep()}")
-        if eaten_sheep:
-            print(f"The wolf has eaten {eaten_sheep.name}")
-            logger.info("%s was eaten", eaten_sheep.name)
-        logger.info("End of round %d, alive sheep: %d", round_counter,
-                    Sheep.alive_sheep)
-        if args.wait:
-            # input("\nFor next round press any key\n")
-            os.system('pause')
-        round_counter += 1
+    try:
+        while simulation.step():
+            round_counter = simulation.round_counter
+            if profiler is not None:
+                start = time.perf_counter()
+            output.add_to_json(round_counter, wolf.get_position_tuple(),
+                               get_position_tuples(simulation.sheep))
+            if profiler is not None:
+                profiler.add("json", time.perf_counter() - start)
+                start = time.perf_counter()
+            output.add_to_csv(round_counter, simulation.alive_sheep)
+            if profiler is not None:
+                profiler.add("csv", time.perf_counter() - start)
+                start = time.perf_counter()
+
+            print(f"\nRound number: {round_counter}\n"
+                  f"{wolf.get_position_string()}\n"
+                  f"Number of alive Sheep: {simulation.alive_sheep}"
+                  )
+            if wolf.last_chasing_sheep:
+                print(
+                    f"The wolf is chasing sheep with number:"
+                    f" {wolf.get_number_of_chasing_sheep()}")
+            eaten_sheep = simulation.eaten_sheep
+            if eaten_sheep:
+                print(f"The wolf has eaten {eaten_sheep.name}")
+            if profiler is not None:
+                profiler.add("print", time.perf_counter() - start)
+                start = time.perf_counter()
+            if eaten_sheep:
+                logger.info("%s was eaten", eaten_sheep.name)
+            logger.info("End of round %d, alive sheep: %d", round_counter,
+                        simulation.alive_sheep)
+            if profiler is not None:
+                profiler.add("log", time.perf_counter() - start)
+                profiler.end_round(round_counter)
+            if (args.checkpoint_every
+                    and round_counter % args.checkpoint_every == 0):
+                save_checkpoint(simulation, output.flush(), args.checkpoint)
+            if args.wait:
+                # input("\nFor next round press any key\n")
+                os.system('pause')
+    finally:
+        # also reached on Ctrl-C, nothing queued is lost; an error of the
+        # background writer is raised after the rounds written so far are
+        # exported and the logger and profiler are stopped
+        try:
+            output.close()
+        finally:
+            try:
+                if not args.no_json:
+                    export_json()
+            finally:
+                stop_logger()
+                if profiler is not None:
+                    profiler.close()
+                    print(f"\n{profiler.summary()}")
 
 
 # Main body
@@ -0,0 +1,99 @@
+"""Latency benchmark of POST /api/predict under concurrent load.
+
+Every number of concurrent clients sends the requested number of single
+point predictions to a running server (python main.py) and the p50, p90 and
+p99 latency and the throughput are written as JSON lines, one line per
+concurrency level.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.request
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def random_point(rng):
+    return {
+        "sepal_length_cm": round(rng.uniform(4.3, 7.9), 1),
+        "sepal_width_cm": round(rng.uniform(2.0, 4.4), 1),
+        "petal_length_cm": round(rng.uniform(1.0, 6.9), 1),
+        "petal_width_cm": round(rng.uniform(0.1, 2.5), 1),
+    }
+
+
+def client(url, n_requests, seed, latencies, errors):
+    rng = random.Random(seed)
+    for _ in range(n_requests):
+        request = urllib.request.Request(
+            url, data=json.dumps(random_point(rng)).encode(),
+            headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+        except OSError:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def benchmark(url, n_clients, n_requests, seed):
+    latencies = []
+    errors = []
+    threads = [threading.Thread(target=client,
+                                args=(url, n_requests, seed + i, latencies, errors))
+               for i in range(n_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    result = {"clients": n_clients, "requests": len(latencies),
+              "errors": len(errors), "seconds": elapsed,
+              "throughput": len(latencies) / elapsed}
+    if latencies:
+        result.update(p50=percentile(latencies, 0.5),
+                      p90=percentile(latencies, 0.9),
+                      p99=percentile(latencies, 0.99))
+    return result
+
+
+def argument_parse():
+    parser = argparse.ArgumentParser(description="Prediction latency benchmark.")
+    parser.add_argument("-u", "--url", default="http://127.0.0.1:5000/api/predict")
+    parser.add_argument("-c", "--clients", type=int, nargs="+",
+                        default=[1, 8, 32], metavar="NUM",
+                        help="Numbers of concurrent clients")
+    parser.add_argument("-n", "--requests", type=int, default=200,
+                        help="Requests sent by every client")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="Write JSON lines here instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    args = argument_parse()
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for n_clients in args.clients:
+            record = benchmark(args.url, n_clients, args.requests, args.seed)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Load test of /api/data with mixed GET/POST/DELETE traffic.
+
+Concurrent clients send a seeded random mix of requests to a running server
+(python main.py, IRIS_CONFIG=production for the tuned setup): GET of a page
+or of the whole table, POST of a new row and DELETE of a row this client
+posted before, so the seeded data is left as it was. Throughput, errors and
+p50/p90/p99 latency of every request type are written as one JSON line per
+concurrency level.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmark_predict import percentile
+
+
+def send(method, url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def client(base_url, n_requests, mix, seed, latencies, errors):
+    rng = random.Random(seed)
+    operations = list(mix)
+    weights = [mix[operation] for operation in operations]
+    posted = []
+    for _ in range(n_requests):
+        operation = rng.choices(operations, weights)[0]
+        if operation == "delete" and not posted:
+            operation = "post"
+        start = time.perf_counter()
+        try:
+            if operation == "get":
+                send("GET", "{}/api/data?limit=50&after={}".format(
+                    base_url, rng.randrange(150)))
+            elif operation == "get_all":
+                send("GET", base_url + "/api/data")
+            elif operation == "post":
+                row = {
+                    "sepal_length_cm": round(rng.uniform(4.3, 7.9), 1),
+                    "sepal_width_cm": round(rng.uniform(2.0, 4.4), 1),
+                    "petal_length_cm": round(rng.uniform(1.0, 6.9), 1),
+                    "petal_width_cm": round(rng.uniform(0.1, 2.5), 1),
+                    "species": rng.randrange(3),
+                }
+                posted.append(send("POST", base_url + "/api/data", row)["primary key:"])
+            else:
+                send("DELETE", "{}/api/data/{}".format(
+                    base_url, posted.pop(rng.randrange(len(posted)))))
+        except (OSError, urllib.error.HTTPError):
+            errors.append(operation)
+            continue
+        latencies.append((operation, time.perf_counter() - start))
+    # leave the database as it was
+    for id in posted:
+        try:
+            send("DELETE", "{}/api/data/{}".format(base_url, id))
+        except OSError:
+            errors.append("cleanup")
+
+
+def summarize(values, elapsed):
+    values.sort()
+    return {"requests": len(values), "throughput": len(values) / elapsed,
+            "p50": percentile(values, 0.5), "p90": percentile(values, 0.9),
+            "p99": percentile(values, 0.99)}
+
+
+def load_test(base_url, n_clients, n_requests, mix, seed):
+    latencies = []
+    errors = []
+    threads = [threading.Thread(target=client, args=(base_url, n_requests, mix,
+                                                     seed + i, latencies, errors))
+               for i in range(n_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    result = {"clients": n_clients, "seconds": elapsed, "errors": len(errors)}
+    if latencies:
+        result["all"] = summarize([latency for _, latency in latencies], elapsed)
+        for operation in mix:
+            values = [latency for name, latency in latencies if name == operation]
+            if values:
+                result[operation] = summarize(values, elapsed)
+    return result
+
+
+def parse_mix(text):
+    """'get=70,post=20,delete=10' -> {'get': 70.0, 'post': 20.0, 'delete': 10.0}"""
+    mix = {}
+    for part in text.split(","):
+        operation, _, weight = part.partition("=")
+        if operation not in ("get", "get_all", "post", "delete"):
+            raise argparse.ArgumentTypeError("unknown operation " + operation)
+        mix[operation] = float(weight)
+    return mix
+
+
+def argument_parse():
+    parser = argparse.ArgumentParser(description="Iris API load test.")
+    parser.add_argument("-u", "--url", default="http://127.0.0.1:5000")
+    parser.add_argument("-c", "--clients", type=int, nargs="+",
+                        default=[1, 8, 32], metavar="NUM",
+                        help="Numbers of concurrent clients")
+    parser.add_argument("-n", "--requests", type=int, default=200,
+                        help="Requests sent by every client")
+    parser.add_argument("-m", "--mix", type=parse_mix,
+                        default=parse_mix("get=70,get_all=5,post=15,delete=10"),
+                        help="Weights of get, get_all, post and delete")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="Write JSON lines here instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    args = argument_parse()
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for n_clients in args.clients:
+            record = load_test(args.url, n_clients, args.requests, args.mix,
+                               args.seed)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
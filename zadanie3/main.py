@@ -1,25 +1,265 @@
-from flask import Flask, render_template, request
+import csv
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+import click
+from flask import Flask, Response, g, render_template, request, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_restful import Resource, Api, reqparse, abort
+from sqlalchemy import event
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# IRIS_CONFIG=production: WAL, pooled connections and a multi-worker server
+CONFIG_MODE = os.environ.get('IRIS_CONFIG', 'development')
+SERVER_HOST = os.environ.get('IRIS_HOST', '127.0.0.1')
+SERVER_PORT = int(os.environ.get('IRIS_PORT', 5000))
+SERVER_WORKERS = int(os.environ.get('IRIS_WORKERS', os.cpu_count() or 1))
+SERVER_THREADS = int(os.environ.get('IRIS_THREADS', 4))
+POOL_SIZE = SERVER_THREADS + 1
+SQLITE_BUSY_TIMEOUT_MS = 5000
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+if CONFIG_MODE == 'production':
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': POOL_SIZE,
+        'max_overflow': POOL_SIZE,
+        'pool_timeout': 30,
+        'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000},
+    }
 db = SQLAlchemy(app)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run next to the single writer, busy_timeout makes writers wait instead of failing."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout={}'.format(SQLITE_BUSY_TIMEOUT_MS))
+    cursor.close()
+
+
+if CONFIG_MODE == 'production':
+    with app.app_context():
+        event.listen(db.engine, 'connect', set_sqlite_pragmas)
 api = Api(app)
 SPECIES_INT_KEYS = {0 : "Iris-setosa", 1 : "Iris-versicolor", 2 : "Iris-virginica"}
 SPECIES_STR_KEYS = {"Iris-setosa": 0, "Iris-versicolor": 1 , "Iris-virginica" : 2}
+IRIS_COLUMNS = ('id', 'sepal_length_cm', 'sepal_width_cm', 'petal_length_cm', 'petal_width_cm', 'species')
+MEASUREMENT_COLUMNS = IRIS_COLUMNS[1:5]
+MAX_PAGE_SIZE = 10000
+STREAM_BATCH_SIZE = 1000
+BULK_BATCH_SIZE = 5000
+RESPONSE_CACHE_SIZE = 256
+# total bytes of the cached bodies, least recently used ones are evicted first
+RESPONSE_CACHE_BYTES = 64 << 20
+# larger bodies are not cached; streamed ones are cached once complete
+CACHE_ENTRY_LIMIT = 1 << 20
+HOME_PAGE_SIZE = 100
+# template chunks joined into one write of the streamed home page
+HOME_STREAM_BUFFER = 200
+# endpoints whose GET responses are cached until the next write
+CACHED_ENDPOINTS = ('home', 'iris', 'irisstats')
+# points classified in one pass of the prediction thread
+PREDICT_MAX_BATCH = 1024
+# Iris.csv header -> IrisModel column
+CSV_COLUMN_NAMES = {'SepalLengthCm': 'sepal_length_cm', 'SepalWidthCm': 'sepal_width_cm',
+                    'PetalLengthCm': 'petal_length_cm', 'PetalWidthCm': 'petal_width_cm', 'Species': 'species'}
+
+
+# bumped by every write, cached responses of older versions are stale; shared
+# memory, so the server workers forked from this process see each other's writes
+data_version = multiprocessing.Value('q', 0)
+# (path, query arguments) -> (data version, etag, body, headers), in LRU order
+response_cache = OrderedDict()
+# sum of the cached body sizes
+response_cache_bytes = 0
+cache_lock = threading.Lock()
+
+
+def bump_data_version():
+    global response_cache_bytes
+    with data_version.get_lock():
+        data_version.value += 1
+    with cache_lock:
+        response_cache.clear()
+        response_cache_bytes = 0
+
+
+def cache_key():
+    return request.path, tuple(sorted(request.args.items(multi=True)))
+
+
+@app.before_request
+def serve_cached_response():
+    g.cache_hit = False
+    if request.method != 'GET' or request.endpoint not in CACHED_ENDPOINTS:
+        return None
+    g.cache_version = data_version.value
+    with cache_lock:
+        entry = response_cache.get(cache_key())
+        if entry is None or entry[0] != g.cache_version:
+            return None
+        response_cache.move_to_end(cache_key())
+    g.cache_hit = True
+    _, etag, body, headers = entry
+    # make_conditional in store_cached_response turns this into a 304
+    return Response(body, status=200, headers=headers)
+
+
+def store_in_cache(key, version, body, headers):
+    global response_cache_bytes
+    etag = hashlib.sha1(body).hexdigest()
+    if len(body) > CACHE_ENTRY_LIMIT:
+        return etag
+    with cache_lock:
+        # a write during the request made this response stale
+        if version == data_version.value:
+            old = response_cache.pop(key, None)
+            if old is not None:
+                response_cache_bytes -= len(old[2])
+            response_cache[key] = (version, etag, body, headers + [('ETag', '"{}"'.format(etag))])
+            response_cache_bytes += len(body)
+            while len(response_cache) > RESPONSE_CACHE_SIZE or response_cache_bytes > RESPONSE_CACHE_BYTES:
+                _, (_, _, evicted, _) = response_cache.popitem(last=False)
+                response_cache_bytes -= len(evicted)
+    return etag
+
+
+def cache_streamed_body(chunks, key, version, headers):
+    """Pass a streamed body through and cache it once complete, if it is small enough."""
+    parts = []
+    size = 0
+    try:
+        for chunk in chunks:
+            yield chunk
+            if parts is not None:
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                size += len(data)
+                if size <= CACHE_ENTRY_LIMIT:
+                    parts.append(data)
+                else:
+                    parts = None
+        if parts is not None:
+            store_in_cache(key, version, b''.join(parts), headers)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+@app.after_request
+def store_cached_response(response):
+    if request.method != 'GET' or request.endpoint not in CACHED_ENDPOINTS or response.status_code != 200:
+        return response
+    if g.cache_hit:
+        return response.make_conditional(request)
+    headers = [(k, v) for k, v in response.headers.items() if k != 'Content-Length']
+    if response.is_streamed:
+        response.response = cache_streamed_body(response.response, cache_key(), g.cache_version, headers)
+        return response
+    response.set_etag(store_in_cache(cache_key(), g.cache_version, response.get_data(), headers))
+    return response.make_conditional(request)
 
 
 class IrisModel(db.Model):
+    # (species, measurement): min/max of one species is a single index seek. The
+    # single-column indexes serve the home page's ORDER BY <column>, id, so its
+    # first rows come without a sort (the composite ones cannot order by species, id)
+    __table_args__ = tuple(db.Index('ix_iris_model_species_{}'.format(column), 'species', column)
+                           for column in ('sepal_length_cm', 'sepal_width_cm', 'petal_length_cm', 'petal_width_cm'))
     id = db.Column(db.Integer, primary_key=True, nullable=False, autoincrement=True)
-    sepal_length_cm = db.Column(db.Float, nullable=False)
-    sepal_width_cm = db.Column(db.Float, nullable=False)
-    petal_length_cm = db.Column(db.Float, nullable=False)
-    petal_width_cm = db.Column(db.Float, nullable=False)
-    species = db.Column(db.Integer, nullable=False)
+    sepal_length_cm = db.Column(db.Float, nullable=False, index=True)
+    sepal_width_cm = db.Column(db.Float, nullable=False, index=True)
+    petal_length_cm = db.Column(db.Float, nullable=False, index=True)
+    petal_width_cm = db.Column(db.Float, nullable=False, index=True)
+    species = db.Column(db.Integer, nullable=False, index=True)
     
     def getValues(self):
         return float(self.sepal_length_cm), float(self.sepal_width_cm), float(self.petal_length_cm), float(self.petal_width_cm)
+
+    def getRow(self):
+        return {column: getattr(self, column) for column in IRIS_COLUMNS[1:]}
+
+
+class IrisSummaryModel(db.Model):
+    """Running count, sum, min and max of one measurement of one species."""
+    species = db.Column(db.Integer, primary_key=True)
+    measurement = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    total = db.Column(db.Float, nullable=False)
+    minimum = db.Column(db.Float, nullable=False)
+    maximum = db.Column(db.Float, nullable=False)
+
+
+def update_summary(rows, removed=False):
+    """Apply inserted (or removed) rows to IrisSummaryModel in the current transaction."""
+    # write the iris rows first, the transaction then holds the SQLite write
+    # lock and no concurrent writer can change the summary rows read below
+    db.session.flush()
+    groups = {}
+    for row in rows:
+        groups.setdefault(row['species'], []).append(row)
+    for species, group in groups.items():
+        for measurement in MEASUREMENT_COLUMNS:
+            values = [row[measurement] for row in group]
+            summary = db.session.get(IrisSummaryModel, (species, measurement))
+            if not removed:
+                if summary is None:
+                    summary = IrisSummaryModel(species=species, measurement=measurement, count=0,
+                                               total=0.0, minimum=min(values), maximum=max(values))
+                    db.session.add(summary)
+                summary.count += len(values)
+                summary.total += math.fsum(values)
+                summary.minimum = min(summary.minimum, min(values))
+                summary.maximum = max(summary.maximum, max(values))
+                continue
+            if summary is None:
+                continue
+            summary.count -= len(values)
+            summary.total -= math.fsum(values)
+            if summary.count <= 0:
+                db.session.delete(summary)
+            elif min(values) <= summary.minimum or max(values) >= summary.maximum:
+                # an extreme was removed, look up the new one in the (species, measurement)
+                # index; min and max are separate queries so SQLite seeks instead of scanning
+                column = getattr(IrisModel, measurement)
+                summary.minimum = db.session.execute(
+                    db.select(db.func.min(column)).where(IrisModel.species == species)).scalar()
+                summary.maximum = db.session.execute(
+                    db.select(db.func.max(column)).where(IrisModel.species == species)).scalar()
+
+
+def create_indexes():
+    """create_all() adds indexes only to new tables, an existing database gets them here."""
+    for index in IrisModel.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+
+def rebuild_summary():
+    """Recompute all summary rows from the iris table with GROUP BY."""
+    db.session.execute(db.delete(IrisSummaryModel))
+    for measurement in MEASUREMENT_COLUMNS:
+        column = getattr(IrisModel, measurement)
+        groups = db.session.execute(
+            db.select(IrisModel.species, db.func.count(), db.func.sum(column),
+                      db.func.min(column), db.func.max(column))
+            .group_by(IrisModel.species))
+        for species, count, total, minimum, maximum in groups:
+            db.session.add(IrisSummaryModel(species=species, measurement=measurement, count=count,
+                                            total=total, minimum=minimum, maximum=maximum))
+    db.session.commit()
+    bump_data_version()
     
 iris_args = reqparse.RequestParser()
 iris_args.add_argument('sepal_length_cm', type=float, required=True)
@@ -28,26 +268,77 @@ iris_args.add_argument('petal_length_cm', type=float, required=True)
 iris_args.add_argument('petal_width_cm', type=float, required=True)
 iris_args.add_argument('species', type=int, choices = (0,1,2), required=True)
 
+# GET /api/data?after=<id>&limit=<n>&fields=<a,b>&species=<0-2>&stream=<json|ndjson>
+iris_query_args = reqparse.RequestParser()
+iris_query_args.add_argument('after', type=int, default=0, location='args')
+iris_query_args.add_argument('limit', type=int, location='args')
+iris_query_args.add_argument('fields', type=str, location='args')
+iris_query_args.add_argument('species', type=int, choices=(0,1,2), action='append', location='args')
+iris_query_args.add_argument('stream', type=str, choices=('json', 'ndjson'), location='args')
+
+
+def iris_select(args):
+    """Build the keyset paginated query, returns it with the selected column names."""
+    fields = ['id']
+    if args['fields']:
+        for field in args['fields'].split(','):
+            field = field.strip()
+            if field not in IRIS_COLUMNS:
+                abort(400, message="Unknown field {}".format(field))
+            if field not in fields:
+                fields.append(field)
+    else:
+        fields = list(IRIS_COLUMNS)
+    query = db.select(*(getattr(IrisModel, field) for field in fields)) \
+        .where(IrisModel.id > args['after']).order_by(IrisModel.id)
+    if args['species']:
+        query = query.where(IrisModel.species.in_(args['species']))
+    if args['limit'] is not None:
+        if not 0 < args['limit'] <= MAX_PAGE_SIZE:
+            abort(400, message="limit must be between 1 and {}".format(MAX_PAGE_SIZE))
+        query = query.limit(args['limit'])
+    return query, fields
+
+
+def stream_rows(query, fields, stream_format):
+    """Stream query rows as a JSON array or NDJSON without materializing them."""
+    def generate():
+        rows = db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        if stream_format == 'ndjson':
+            for batch in rows.partitions():
+                yield ''.join(json.dumps(dict(zip(fields, row))) + '\n' for row in batch)
+            return
+        yield '['
+        separator = ''
+        for batch in rows.partitions():
+            yield separator + ','.join(json.dumps(dict(zip(fields, row))) for row in batch)
+            separator = ','
+        yield ']'
+    mimetype = 'application/x-ndjson' if stream_format == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
 class Iris(Resource):
     def get(self):
-        iris_data = IrisModel.query.all()
-        result = []
-        for iris in iris_data:
-            result.append({
-                'id': iris.id,
-                'sepal_length_cm': iris.sepal_length_cm,
-                'sepal_width_cm': iris.sepal_width_cm,
-                'petal_length_cm': iris.petal_length_cm,
-                'petal_width_cm': iris.petal_width_cm,
-                'species': iris.species
-            })
-        return result
+        args = iris_query_args.parse_args()
+        query, fields = iris_select(args)
+        if args['stream']:
+            return stream_rows(query, fields, args['stream'])
+        rows = db.session.execute(query).all()
+        result = [dict(zip(fields, row)) for row in rows]
+        headers = {}
+        if args['limit'] is not None and len(rows) == args['limit']:
+            # cursor for the next page: GET /api/data?after=<X-Next-After>
+            headers['X-Next-After'] = str(rows[-1][0])
+        return result, 200, headers
     def delete(self, id):
         iris = IrisModel.query.get(id)
         if not iris:
             abort(404, message="Iris with id {} not found".format(id))
         db.session.delete(iris)
+        update_summary([iris.getRow()], removed=True)
         db.session.commit()
+        bump_data_version()
         return {'primary key': iris.id}, 200
     def post(self): 
         args = iris_args.parse_args()
@@ -60,21 +351,343 @@ class Iris(Resource):
             species=args['species']
             )
             db.session.add(new_iris)
+            update_summary([new_iris.getRow()])
             db.session.commit()
+            bump_data_version()
             return {"primary key:" : new_iris.id}, 201
         else:  
             return 'invalid data', 400
 
+
+
+bulk_args = reqparse.RequestParser()
+bulk_args.add_argument('batch_size', type=int, default=BULK_BATCH_SIZE, location='args')
+
+
+def validate_iris_row(row):
+    """Check a row with the rules of iris_args/add_iris, return values for IrisModel."""
+    values = {}
+    for column in IRIS_COLUMNS[1:5]:
+        if row.get(column) is None:
+            raise ValueError("{} is missing".format(column))
+        value = float(row[column])
+        if not (value > 0 and math.isfinite(value)):
+            raise ValueError("{} must be a positive number".format(column))
+        values[column] = value
+    species = row.get('species')
+    if species in SPECIES_STR_KEYS:
+        species = SPECIES_STR_KEYS[species]
+    if species is None or int(species) != float(species) or int(species) not in SPECIES_INT_KEYS:
+        raise ValueError("species must be 0, 1 or 2")
+    values['species'] = int(species)
+    return values
+
+
+def insert_batch(number, valid_rows, errors):
+    report = {'batch': number, 'inserted': 0, 'errors': errors}
+    if valid_rows:
+        try:
+            # one executemany per batch and one commit
+            db.session.execute(db.insert(IrisModel), valid_rows)
+            update_summary(valid_rows)
+            db.session.commit()
+            bump_data_version()
+            report['inserted'] = len(valid_rows)
+        except Exception as e:
+            db.session.rollback()
+            report['errors'].append({'row': None, 'error': "batch rejected: {}".format(e)})
+    return report
+
+
+def ingest_rows(rows, batch_size=BULK_BATCH_SIZE):
+    """Validate and insert an iterable of row dicts in batches of batch_size rows."""
+    reports = []
+    valid_rows = []
+    errors = []
+    for i, row in enumerate(rows):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("row must be an object")
+            valid_rows.append(validate_iris_row(row))
+        except (ValueError, TypeError) as e:
+            errors.append({'row': i, 'error': str(e)})
+        if (i + 1) % batch_size == 0:
+            reports.append(insert_batch(len(reports), valid_rows, errors))
+            valid_rows = []
+            errors = []
+    if valid_rows or errors:
+        reports.append(insert_batch(len(reports), valid_rows, errors))
+    return reports
+
+
+def read_csv_rows(text_stream):
+    """Yield rows of a CSV with IrisModel or Iris.csv column names."""
+    for row in csv.DictReader(text_stream):
+        yield {CSV_COLUMN_NAMES.get(key, key): value for key, value in row.items()}
+
+
+class IrisBulk(Resource):
+    def post(self):
+        args = bulk_args.parse_args()
+        if args['batch_size'] <= 0:
+            abort(400, message="batch_size must be positive")
+        if request.mimetype == 'application/json':
+            rows = request.get_json()
+            if not isinstance(rows, list):
+                abort(400, message="Expected a JSON array of rows")
+        elif 'file' in request.files:
+            rows = read_csv_rows(io.TextIOWrapper(request.files['file'].stream, encoding='utf-8'))
+        elif request.mimetype == 'text/csv':
+            rows = read_csv_rows(io.TextIOWrapper(request.stream, encoding='utf-8'))
+        else:
+            abort(415, message="Send a JSON array, a text/csv body or a CSV file")
+        reports = ingest_rows(rows, args['batch_size'])
+        inserted = sum(report['inserted'] for report in reports)
+        rejected = sum(len(report['errors']) for report in reports)
+        return {'inserted': inserted, 'rejected': rejected, 'batches': reports}, 201 if inserted else 400
+
+
+# GET /api/stats?species=<0-2>&bucket_width=<cm>&source=<summary|query>
+stats_args = reqparse.RequestParser()
+stats_args.add_argument('species', type=int, choices=(0,1,2), action='append', location='args')
+stats_args.add_argument('bucket_width', type=float, location='args')
+stats_args.add_argument('source', type=str, choices=('summary', 'query'), default='summary', location='args')
+
+
+def summary_stats(species):
+    """Per species stats read from the summary rows, O(species)."""
+    query = db.select(IrisSummaryModel)
+    if species:
+        query = query.where(IrisSummaryModel.species.in_(species))
+    result = {}
+    for summary in db.session.execute(query).scalars():
+        stats = result.setdefault(SPECIES_INT_KEYS[summary.species], {'count': summary.count})
+        stats[summary.measurement] = {'mean': summary.total / summary.count,
+                                      'min': summary.minimum, 'max': summary.maximum}
+    return result
+
+
+def aggregate_stats(species):
+    """Per species stats computed with one GROUP BY over the iris table."""
+    columns = [IrisModel.species, db.func.count()]
+    for measurement in MEASUREMENT_COLUMNS:
+        column = getattr(IrisModel, measurement)
+        columns += [db.func.avg(column), db.func.min(column), db.func.max(column)]
+    query = db.select(*columns).group_by(IrisModel.species)
+    if species:
+        query = query.where(IrisModel.species.in_(species))
+    result = {}
+    for row in db.session.execute(query):
+        stats = result[SPECIES_INT_KEYS[row[0]]] = {'count': row[1]}
+        for i, measurement in enumerate(MEASUREMENT_COLUMNS):
+            mean, minimum, maximum = row[2 + 3 * i:5 + 3 * i]
+            stats[measurement] = {'mean': mean, 'min': minimum, 'max': maximum}
+    return result
+
+
+def histograms(species, bucket_width):
+    """Bucket counts of every measurement per species, buckets start at multiples of bucket_width."""
+    result = {}
+    for measurement in MEASUREMENT_COLUMNS:
+        # measurements are positive, so the integer cast is floor()
+        bucket = db.cast(getattr(IrisModel, measurement) / bucket_width, db.Integer)
+        query = db.select(IrisModel.species, bucket, db.func.count()) \
+            .group_by(IrisModel.species, bucket).order_by(IrisModel.species, bucket)
+        if species:
+            query = query.where(IrisModel.species.in_(species))
+        per_species = result[measurement] = {}
+        for species_key, index, count in db.session.execute(query):
+            per_species.setdefault(SPECIES_INT_KEYS[species_key], []).append(
+                {'start': index * bucket_width, 'count': count})
+    return result
+
+
+class IrisStats(Resource):
+    def get(self):
+        args = stats_args.parse_args()
+        if args['source'] == 'query':
+            result = {'species': aggregate_stats(args['species'])}
+        else:
+            result = {'species': summary_stats(args['species'])}
+        if args['bucket_width'] is not None:
+            if not (args['bucket_width'] > 0 and math.isfinite(args['bucket_width'])):
+                abort(400, message="bucket_width must be a positive number")
+            result['histograms'] = histograms(args['species'], args['bucket_width'])
+        return result, 200
+
+
+
+# species keys and per species mean measurements, rebuilt when data_version changes
+centroid_model = {'version': None, 'species': [], 'centroids': []}
+model_lock = threading.Lock()
+
+
+def refresh_centroid_model():
+    """Rebuild the nearest centroid model from the summary rows if the data changed."""
+    global centroid_model
+    if centroid_model['version'] == data_version.value:
+        return centroid_model
+    with model_lock:
+        version = data_version.value
+        if centroid_model['version'] != version:
+            means = {}
+            for summary in db.session.execute(db.select(IrisSummaryModel)).scalars():
+                means.setdefault(summary.species, {})[summary.measurement] = summary.total / summary.count
+            species = sorted(means)
+            centroids = [[means[key][measurement] for measurement in MEASUREMENT_COLUMNS] for key in species]
+            if np is not None:
+                centroids = np.array(centroids, dtype=float).reshape(len(species), len(MEASUREMENT_COLUMNS))
+            centroid_model = {'version': version, 'species': species, 'centroids': centroids}
+    return centroid_model
+
+
+def classify(model, points):
+    """Species key of the nearest centroid of every point."""
+    species = model['species']
+    centroids = model['centroids']
+    if np is not None:
+        points = np.asarray(points, dtype=float).reshape(-1, len(MEASUREMENT_COLUMNS))
+        distances = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        return [species[i] for i in distances.argmin(axis=1).tolist()]
+    labels = []
+    for point in points:
+        distances = [sum((p - c) ** 2 for p, c in zip(point, centroid)) for centroid in centroids]
+        labels.append(species[distances.index(min(distances))])
+    return labels
+
+
+class PredictionBatcher:
+    """Coalesces concurrent prediction requests into one classify() call.
+
+    Requests wait in a queue, the worker thread takes everything queued (up to
+    max_batch points) and answers all of them from one array computation.
+    """
+    def __init__(self, max_batch=PREDICT_MAX_BATCH):
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def predict(self, model, points):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self.run, daemon=True)
+                    self.thread.start()
+        # [model, points, result, error, done]
+        item = [model, points, None, None, threading.Event()]
+        self.requests.put(item)
+        item[4].wait()
+        if item[3] is not None:
+            raise item[3]
+        return item[2]
+
+    def run(self):
+        while True:
+            batch = [self.requests.get()]
+            size = len(batch[0][1])
+            while size < self.max_batch:
+                try:
+                    item = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[1])
+            # the newest model answers the whole batch
+            model = max((item[0] for item in batch), key=lambda m: m['version'])
+            try:
+                labels = classify(model, [point for item in batch for point in item[1]])
+                start = 0
+                for item in batch:
+                    item[2] = labels[start:start + len(item[1])]
+                    start += len(item[1])
+            except Exception as e:
+                for item in batch:
+                    item[3] = e
+            for item in batch:
+                item[4].set()
+
+
+prediction_batcher = PredictionBatcher()
+
+
+def prediction_point(row):
+    if not isinstance(row, dict):
+        raise ValueError("row must be an object")
+    point = []
+    for column in MEASUREMENT_COLUMNS:
+        if row.get(column) is None:
+            raise ValueError("{} is missing".format(column))
+        value = float(row[column])
+        if not (value > 0 and math.isfinite(value)):
+            raise ValueError("{} must be a positive number".format(column))
+        point.append(value)
+    return point
+
+
+class IrisPredict(Resource):
+    def post(self):
+        """Classify one JSON object or an array of objects with the four measurements."""
+        body = request.get_json(silent=True)
+        rows = body if isinstance(body, list) else [body]
+        try:
+            points = [prediction_point(row) for row in rows]
+        except (ValueError, TypeError) as e:
+            abort(400, message=str(e))
+        if not points:
+            return [], 200
+        model = refresh_centroid_model()
+        if not model['species']:
+            abort(503, message="No iris data to train the model")
+        labels = prediction_batcher.predict(model, points)
+        result = [{'species': key, 'species_name': SPECIES_INT_KEYS[key]} for key in labels]
+        return (result if isinstance(body, list) else result[0]), 200
+
        
 api.add_resource(Iris, '/api/data', '/api/data/<int:id>')
+api.add_resource(IrisBulk, '/api/data/bulk')
+api.add_resource(IrisStats, '/api/stats')
+api.add_resource(IrisPredict, '/api/predict')
+
+# GET /?page=<n>&per_page=<n>&sort=<column>&order=<asc|desc>
+home_args = reqparse.RequestParser()
+home_args.add_argument('page', type=int, default=1, location='args')
+home_args.add_argument('per_page', type=int, default=HOME_PAGE_SIZE, location='args')
+home_args.add_argument('sort', type=str, default='id', choices=IRIS_COLUMNS, location='args')
+home_args.add_argument('order', type=str, default='asc', choices=('asc', 'desc'), location='args')
+
+
+def page_rows(rows, per_page, pager):
+    """Yield at most per_page rows, the row after them only sets pager['has_next']."""
+    for i, row in enumerate(rows):
+        if i == per_page:
+            pager['has_next'] = True
+            break
+        yield row
+
 
 @app.route('/')
 def home():
-    iris_data = IrisModel.query.all()
-    for i, iris in enumerate(iris_data):
-        iris.species = SPECIES_INT_KEYS.get(iris.species)
-        iris.number = i + 1
-    return render_template('index.html', data=iris_data)
+    args = home_args.parse_args()
+    if args['page'] < 1 or not 0 < args['per_page'] <= MAX_PAGE_SIZE:
+        abort(400, message="page must be positive and per_page between 1 and {}".format(MAX_PAGE_SIZE))
+    offset = (args['page'] - 1) * args['per_page']
+    sort_column = getattr(IrisModel, args['sort'])
+    order_by = [sort_column, IrisModel.id]
+    if args['order'] == 'desc':
+        order_by = [column.desc() for column in order_by]
+    # species names are mapped in SQL, the ORM objects are not touched
+    query = db.select(*(getattr(IrisModel, column) for column in IRIS_COLUMNS[:5]),
+                      db.case(SPECIES_INT_KEYS, value=IrisModel.species).label('species')) \
+        .order_by(*order_by).offset(offset).limit(args['per_page'] + 1) \
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    pager = dict(args, offset=offset, has_next=False)
+    context = {'data': page_rows(db.session.execute(query), args['per_page'], pager), 'pager': pager}
+    app.update_template_context(context)
+    # rows are rendered and sent while the query result is read
+    stream = app.jinja_env.get_template('index.html').stream(context)
+    stream.enable_buffering(HOME_STREAM_BUFFER)
+    return Response(stream_with_context(stream), mimetype='text/html')
 
 @app.route('/add', methods=['GET', 'POST'])
 def add_iris():
@@ -92,7 +705,9 @@ def add_iris():
                     return abort(400)
 
             db.session.add(iris)
+            update_summary([iris.getRow()])
             db.session.commit()
+            bump_data_version()
             iris.species = SPECIES_INT_KEYS.get(iris.species)
             return render_template('success.html', iris=iris)
         except Exception as e:
@@ -108,7 +723,51 @@ def delete_iris(id):
     except Exception as e:
         return f"An error occurred: {e}", 400
 
+@app.cli.command('seed-db')
+@click.argument('path', default='Iris.csv')
+@click.option('--batch-size', default=BULK_BATCH_SIZE)
+def seed_db(path, batch_size):
+    """Load a CSV file (Iris.csv by default) into the database."""
+    db.create_all()
+    create_indexes()
+    rebuild_summary()
+    with open(path, newline='') as csv_file:
+        reports = ingest_rows(read_csv_rows(csv_file), batch_size)
+    for report in reports:
+        for error in report['errors']:
+            click.echo("Batch {} row {}: {}".format(report['batch'], error['row'], error['error']))
+    click.echo("Inserted {} rows".format(sum(report['inserted'] for report in reports)))
+
+def run_production():
+    """Serve the app with gunicorn, SERVER_WORKERS processes of SERVER_THREADS threads."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("gunicorn is not installed, falling back to the threaded Flask server")
+        app.run(host=SERVER_HOST, port=SERVER_PORT, threaded=True)
+        return
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', '{}:{}'.format(SERVER_HOST, SERVER_PORT))
+            self.cfg.set('workers', SERVER_WORKERS)
+            self.cfg.set('threads', SERVER_THREADS)
+            # workers are forked from this process and share data_version
+            self.cfg.set('preload_app', True)
+
+        def load(self):
+            return app
+
+    Server().run()
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
-    app.run(debug=True)
+        create_indexes()
+        rebuild_summary()
+        # forked workers must not inherit open pooled connections
+        db.engine.dispose()
+    if CONFIG_MODE == 'production':
+        run_production()
+    else:
+        app.run(debug=True)